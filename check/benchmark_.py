@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+import sys
+
+import symboliq.benchmarks
+
+if __name__ == "__main__":
+    exit(symboliq.benchmarks.main(sys.argv[1:]))
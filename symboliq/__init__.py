@@ -1,4 +1,63 @@
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 from ._version import __version__
-from .dirac_notation import get_simp_steps, qapply
 
-__all__ = ["__version__", "get_simp_steps", "qapply"]
+if TYPE_CHECKING:
+    from .compiled_operator import CompiledOperator, qapply_batch
+    from .dirac_notation import get_simp_steps, qapply
+    from .simulator import Simulator
+
+# Importing sympy.physics.quantum takes most of a second, so the names below and the
+# submodules are only imported when they are first used. ``import symboliq`` alone is then
+# cheap for tools that only need the version, and for processes that never simplify anything.
+_EXPORTS = {
+    "CompiledOperator": "compiled_operator",
+    "qapply_batch": "compiled_operator",
+    "get_simp_steps": "dirac_notation",
+    "qapply": "dirac_notation",
+    "Simulator": "simulator",
+}
+_SUBMODULES = (
+    "benchmarks",
+    "cache",
+    "coefficients",
+    "compiled_operator",
+    "dirac_notation",
+    "disk_cache",
+    "evaluator",
+    "fusion",
+    "measurement",
+    "numeric",
+    "operators",
+    "parallel",
+    "profiling",
+    "simulator",
+    "sparse_state",
+    "stabilizer",
+    "third_party",
+)
+
+__all__ = [
+    "__version__",
+    "CompiledOperator",
+    "get_simp_steps",
+    "qapply",
+    "qapply_batch",
+    "Simulator",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_EXPORTS) | set(_SUBMODULES))
@@ -0,0 +1,274 @@
+"""Times qapply, get_simp_steps, get_steps_latex and tensor_product_simp_fork on families of
+circuits of growing size, and importing symboliq, and compares the results with an earlier run.
+
+    check/benchmark_.py --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import sympy
+from sympy.physics.quantum import TensorProduct
+
+from symboliq._version import __version__
+from symboliq.dirac_notation import (
+    DiracNotation,
+    cx,
+    gate_reduce_cache,
+    get_simp_steps,
+    h,
+    i,
+    inner_product_cache,
+    ket_0,
+    qapply,
+    x,
+    z,
+)
+from symboliq.third_party import tensor_product_simp_fork
+
+Results = Dict[str, Any]
+
+
+class Case(NamedTuple):
+    circuit: str
+    num_qubits: int
+    depth: int
+    expr: sympy.Expr
+
+
+def _layer(gates: Sequence[sympy.Expr]) -> sympy.Expr:
+    return gates[0] if len(gates) == 1 else TensorProduct(*gates)
+
+
+def _cx_layer(num_qubits: int, control: int) -> sympy.Expr:
+    # cx acts on the factor at position ``control`` and the one to its right
+    return _layer([i] * control + [cx] + [i] * (num_qubits - control - 2))
+
+
+def ghz(num_qubits: int) -> sympy.Expr:
+    """Returns the circuit preparing (|0...0> + |1...1>)/sqrt(2), applied to |0...0>"""
+    gates = [_cx_layer(num_qubits, control) for control in reversed(range(num_qubits - 1))]
+    gates.append(_layer([h] + [i] * (num_qubits - 1)))
+    return sympy.Mul(*gates) * _layer([ket_0] * num_qubits)
+
+
+def hadamard_layers(num_qubits: int, depth: int) -> sympy.Expr:
+    """Returns ``depth`` layers of Hadamard gates on every qubit, applied to |0...0>"""
+    return sympy.Mul(*[_layer([h] * num_qubits)] * depth) * _layer([ket_0] * num_qubits)
+
+
+def random_clifford(num_qubits: int, depth: int, seed: int = 0) -> sympy.Expr:
+    """Returns ``depth`` random layers of one qubit Clifford gates, each followed by a CNOT on a
+    random pair of neighbouring qubits, applied to |0...0>
+    """
+    rng = random.Random(seed)
+    gates = []
+    for _ in range(depth):
+        gates.append(_layer([rng.choice([i, x, z, h]) for _ in range(num_qubits)]))
+        if num_qubits > 1:
+            gates.append(_cx_layer(num_qubits, rng.randrange(num_qubits - 1)))
+    return sympy.Mul(*reversed(gates)) * _layer([ket_0] * num_qubits)
+
+
+def _tensor_product_simp(expr: sympy.Expr) -> sympy.Expr:
+    # Expanding the whole circuit is exponential in its depth, so this times the first gate
+    # applied to the initial state, which is what the symbolic backend simplifies each step
+    first_gate, state = expr.args[-2:]
+    if isinstance(first_gate, sympy.Pow):
+        first_gate = first_gate.base
+    return tensor_product_simp_fork(sympy.Mul(first_gate, state).expand(tensorproduct=True))
+
+
+def _get_steps_latex(expr: sympy.Expr) -> str:
+    return DiracNotation(expr).get_steps_latex()
+
+
+def _qapply_sparse(expr: sympy.Expr) -> sympy.Basic:
+    return qapply(expr, backend="sparse")
+
+
+FUNCTIONS: Dict[str, Callable[[sympy.Expr], Any]] = {
+    "qapply": qapply,
+    "qapply_sparse": _qapply_sparse,
+    "get_simp_steps": get_simp_steps,
+    "get_steps_latex": _get_steps_latex,
+    "tensor_product_simp_fork": _tensor_product_simp,
+}
+
+# Modules whose import is timed, each in a fresh interpreter
+IMPORTS = ("symboliq", "symboliq.dirac_notation")
+
+
+def default_cases(
+    qubit_counts: Sequence[int] = (2, 3), depths: Sequence[int] = (1, 2)
+) -> List[Case]:
+    """Returns the circuits benchmarked by default
+    Args:
+        qubit_counts: The register sizes to benchmark
+        depths: The numbers of layers of the layered circuits
+    Returns:
+        One case per circuit, size and depth
+    """
+    cases = []
+    for num_qubits in qubit_counts:
+        cases.append(Case("ghz", num_qubits, 1, ghz(num_qubits)))
+        for depth in depths:
+            cases.append(
+                Case("hadamard_layers", num_qubits, depth, hadamard_layers(num_qubits, depth))
+            )
+            cases.append(
+                Case("random_clifford", num_qubits, depth, random_clifford(num_qubits, depth))
+            )
+    return cases
+
+
+def time_function(function: Callable[[sympy.Expr], Any], expr: sympy.Expr, repeats: int) -> Results:
+    """Times a function on an expression, starting every run with empty caches
+    Args:
+        function: The function to time
+        expr: Its argument
+        repeats: How many times to run it
+    Returns:
+        The fastest and median wall time in seconds, or the error the function raised
+    """
+    times = []
+    for _ in range(repeats):
+        inner_product_cache.clear()
+        gate_reduce_cache.clear()
+        start = time.perf_counter()
+        try:
+            function(expr)
+        except Exception as error:  # pylint: disable=broad-except
+            return {"error": f"{type(error).__name__}: {error}"}
+        times.append(time.perf_counter() - start)
+    return {"min_seconds": min(times), "median_seconds": statistics.median(times)}
+
+
+def time_import(module: str, repeats: int) -> Results:
+    """Times importing a module in a new Python process, so that nothing is imported already
+    Args:
+        module: The name of the module
+        repeats: How many processes to time the import in
+    Returns:
+        The fastest and median wall time in seconds, or the error the import raised
+    """
+    code = f"import time; start = time.perf_counter(); import {module}; "
+    code += "print(time.perf_counter() - start)"
+    # The package may not be installed, so the directory containing it goes on the path
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+    times = []
+    for _ in range(repeats):
+        process = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=False
+        )
+        if process.returncode:
+            return {"error": process.stderr.strip().splitlines()[-1]}
+        times.append(float(process.stdout))
+    return {"min_seconds": min(times), "median_seconds": statistics.median(times)}
+
+
+def run(
+    cases: Sequence[Case],
+    functions: Optional[Sequence[str]] = None,
+    repeats: int = 3,
+    imports: Sequence[str] = (),
+) -> Results:
+    """Times every function on every case
+    Args:
+        cases: The circuits to benchmark
+        functions: The names of the functions in FUNCTIONS to time, all of them by default
+        repeats: How many times to time each function on each case
+        imports: The modules to time the import of
+    Returns:
+        The results together with the versions they were measured with, ready to dump as JSON
+    """
+    results = []
+    for name in FUNCTIONS if functions is None else functions:
+        for case in cases:
+            result: Results = {
+                "benchmark": f"{name}/{case.circuit}/{case.num_qubits}/{case.depth}",
+                "function": name,
+                "circuit": case.circuit,
+                "num_qubits": case.num_qubits,
+                "depth": case.depth,
+                "repeats": repeats,
+            }
+            result.update(time_function(FUNCTIONS[name], case.expr, repeats))
+            results.append(result)
+    for module in imports:
+        result = {"benchmark": f"import/{module}", "module": module, "repeats": repeats}
+        result.update(time_import(module, repeats))
+        results.append(result)
+    metadata = {
+        "symboliq": __version__,
+        "sympy": sympy.__version__,
+        "python": platform.python_version(),
+    }
+    return {"metadata": metadata, "results": results}
+
+
+def compare(baseline: Results, current: Results, threshold: float = 0.25) -> List[str]:
+    """Finds the benchmarks that got slower, or started failing, since a baseline run
+    Args:
+        baseline: The results of an earlier run
+        current: The results of this run
+        threshold: The relative increase of the median time that counts as a regression
+    Returns:
+        A description of every regression
+    """
+    old_results = {result["benchmark"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = old_results.get(result["benchmark"])
+        if old is None or "error" in old:
+            continue
+        if "error" in result:
+            regressions.append(f"{result['benchmark']} now fails with {result['error']}")
+            continue
+        ratio = result["median_seconds"] / old["median_seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{result['benchmark']} is {ratio:.2f} times slower")
+    return regressions
+
+
+def _format_result(result: Results) -> str:
+    if "error" in result:
+        return f"{result['benchmark']:<55} {result['error']}"
+    return f"{result['benchmark']:<55} {result['median_seconds'] * 1000:10.2f} ms"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--qubits", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--functions", nargs="+", choices=list(FUNCTIONS))
+    parser.add_argument("--imports", nargs="*", default=list(IMPORTS))
+    args = parser.parse_args(argv)
+
+    cases = default_cases(args.qubits, args.depths)
+    results = run(cases, args.functions, args.repeats, args.imports)
+    for result in results["results"]:
+        print(_format_result(result))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
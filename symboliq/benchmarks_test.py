@@ -0,0 +1,116 @@
+import json
+import pathlib
+
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+
+from symboliq import benchmarks
+from symboliq.dirac_notation import cx, ket_0, ket_1, qapply
+
+
+def test_circuits() -> None:
+    assert qapply(benchmarks.ghz(3), backend="sparse") == sympy.sqrt(2) / 2 * TensorProduct(
+        ket_0, ket_0, ket_0
+    ) + sympy.sqrt(2) / 2 * TensorProduct(ket_1, ket_1, ket_1)
+    assert qapply(benchmarks.hadamard_layers(1, 2), backend="sparse") == ket_0
+    assert benchmarks.random_clifford(3, 2, seed=1) == benchmarks.random_clifford(3, 2, seed=1)
+    assert benchmarks.random_clifford(1, 1).args[-1] == ket_0
+
+    cases = benchmarks.default_cases([2], [1, 2])
+    assert [(case.circuit, case.depth) for case in cases] == [
+        ("ghz", 1),
+        ("hadamard_layers", 1),
+        ("random_clifford", 1),
+        ("hadamard_layers", 2),
+        ("random_clifford", 2),
+    ]
+
+
+def test_time_function() -> None:
+    for name in ["qapply", "get_simp_steps", "get_steps_latex"]:
+        result = benchmarks.time_function(benchmarks.FUNCTIONS[name], benchmarks.ghz(2), 2)
+        assert 0 < result["min_seconds"] <= result["median_seconds"]
+
+    # A two qubit gate applied to a one qubit state
+    result = benchmarks.time_function(benchmarks.FUNCTIONS["qapply"], cx * ket_0, 1)
+    assert result == {"error": "TypeError: TensorProduct expected, got: |0>"}
+    assert benchmarks._format_result({"benchmark": "qapply/cx", **result}).split() == [
+        "qapply/cx",
+        "TypeError:",
+        "TensorProduct",
+        "expected,",
+        "got:",
+        "|0>",
+    ]
+
+
+def test_run() -> None:
+    cases = benchmarks.default_cases([2], [2])
+    results = benchmarks.run(cases, ["qapply_sparse", "tensor_product_simp_fork"], repeats=1)
+    assert results["metadata"]["sympy"] == sympy.__version__
+    assert [result["benchmark"] for result in results["results"]] == [
+        "qapply_sparse/ghz/2/1",
+        "qapply_sparse/hadamard_layers/2/2",
+        "qapply_sparse/random_clifford/2/2",
+        "tensor_product_simp_fork/ghz/2/1",
+        "tensor_product_simp_fork/hadamard_layers/2/2",
+        "tensor_product_simp_fork/random_clifford/2/2",
+    ]
+    assert all(result["repeats"] == 1 for result in results["results"])
+
+
+def test_time_import() -> None:
+    result = benchmarks.time_import("symboliq", 2)
+    assert 0 < result["min_seconds"] <= result["median_seconds"]
+    result = benchmarks.time_import("symboliq.missing", 1)
+    assert result == {"error": "ModuleNotFoundError: No module named 'symboliq.missing'"}
+
+    results = benchmarks.run([], imports=["symboliq"], repeats=1)
+    assert [result["benchmark"] for result in results["results"]] == ["import/symboliq"]
+
+
+def test_compare() -> None:
+    baseline = {
+        "results": [
+            {"benchmark": "a", "median_seconds": 1.0},
+            {"benchmark": "b", "median_seconds": 1.0},
+            {"benchmark": "c", "median_seconds": 1.0},
+            {"benchmark": "d", "error": "TypeError"},
+        ]
+    }
+    current = {
+        "results": [
+            {"benchmark": "a", "median_seconds": 1.2},
+            {"benchmark": "b", "median_seconds": 2.0},
+            {"benchmark": "c", "error": "TypeError"},
+            {"benchmark": "d", "median_seconds": 1.0},
+            {"benchmark": "e", "median_seconds": 1.0},
+        ]
+    }
+    assert benchmarks.compare(baseline, current) == [
+        "b is 2.00 times slower",
+        "c now fails with TypeError",
+    ]
+    assert benchmarks.compare(baseline, current, threshold=0.1)[0] == "a is 1.20 times slower"
+
+
+def test_main(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    args = ["--qubits", "3", "--depths", "1", "--repeats", "1"]
+    args += ["--functions", "qapply", "qapply_sparse", "--imports"]
+    output = tmp_path / "results.json"
+    assert benchmarks.main(args + ["--output", str(output)]) == 0
+    printed = capsys.readouterr().out
+    assert "qapply_sparse/ghz/3/1" in printed
+    # The symbolic backend applies the cx layers of three qubits factor by factor
+    assert "qapply/ghz/3/1      " in printed and "TypeError" not in printed
+
+    results = json.loads(output.read_text())
+    assert benchmarks.main(args + ["--compare", str(output), "--threshold", "1000"]) == 0
+
+    for result in results["results"]:
+        if "median_seconds" in result:
+            result["median_seconds"] /= 1e6
+    output.write_text(json.dumps(results))
+    assert benchmarks.main(args + ["--compare", str(output)]) == 1
+    assert "Regression: qapply_sparse/ghz/3/1 is" in capsys.readouterr().out
@@ -0,0 +1,73 @@
+import collections
+import contextlib
+from typing import Callable, Generic, Hashable, Iterator, NamedTuple, TypeVar
+
+ValueT = TypeVar("ValueT")
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache(Generic[ValueT]):
+    """A dictionary of computed values that evicts the least recently used entry once it holds
+    ``maxsize`` of them, and counts its hits and misses.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries: "collections.OrderedDict[Hashable, ValueT]" = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable, compute: Callable[[], ValueT]) -> ValueT:
+        """Returns the cached value for a key, computing and storing it on a miss
+        Args:
+            key: Any hashable key, such as a sympy expression
+            compute: Called to create the value when the key is not cached
+        Returns:
+            The cached or newly computed value
+        """
+        if not self.enabled:
+            return compute()
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Removes every entry and resets the hit and miss counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @contextlib.contextmanager
+    def disabled(self) -> Iterator[None]:
+        """Bypasses the cache inside a with block, for example to debug the computation it
+        would otherwise skip
+        """
+        enabled = self.enabled
+        self.enabled = False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
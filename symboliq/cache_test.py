@@ -0,0 +1,45 @@
+import pytest
+
+from symboliq.cache import CacheInfo, LRUCache
+
+
+def test_lookup() -> None:
+    cache: LRUCache[int] = LRUCache(maxsize=2)
+    assert cache.lookup("a", lambda: 1) == 1
+    assert cache.lookup("a", lambda: 2) == 1
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+
+
+def test_eviction() -> None:
+    cache: LRUCache[int] = LRUCache(maxsize=2)
+    cache.lookup("a", lambda: 1)
+    cache.lookup("b", lambda: 2)
+    cache.lookup("a", lambda: 1)
+    cache.lookup("c", lambda: 3)
+    assert len(cache) == 2
+    # "b" was the least recently used entry, so it is the one that got evicted
+    assert cache.lookup("b", lambda: 4) == 4
+    assert cache.lookup("c", lambda: 5) == 3
+
+
+def test_clear() -> None:
+    cache: LRUCache[int] = LRUCache()
+    cache.lookup("a", lambda: 1)
+    cache.clear()
+    assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=4096, currsize=0)
+
+
+def test_invalid_maxsize() -> None:
+    with pytest.raises(ValueError, match="at least 1"):
+        LRUCache(maxsize=0)
+
+
+def test_disabled() -> None:
+    cache: LRUCache[int] = LRUCache()
+    cache.lookup("a", lambda: 1)
+    with cache.disabled():
+        assert cache.lookup("a", lambda: 2) == 2
+        assert cache.lookup("b", lambda: 3) == 3
+    assert cache.enabled
+    assert cache.lookup("a", lambda: 4) == 1
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=4096, currsize=1)
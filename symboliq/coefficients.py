@@ -0,0 +1,161 @@
+import fractions
+from typing import Dict, List, Tuple, Union, cast
+
+import sympy
+
+from symboliq.operators import Columns, LoweredFactor, SparseOperator
+from symboliq.sparse_state import Amplitudes, SparseState
+
+POLICIES = ("eager", "collect", "deferred", "field")
+
+Parts = Tuple[fractions.Fraction, fractions.Fraction, fractions.Fraction, fractions.Fraction]
+
+
+class Sqrt2Complex:
+    """An element ``a + b*sqrt(2) + I*(c + d*sqrt(2))`` of Q(sqrt(2), i) with rational a, b, c, d.
+
+    The amplitudes of circuits of Clifford gates and Hadamards all have this form, and adding
+    or multiplying four fractions is much cheaper than canonicalizing a sympy product, while
+    staying exact so that amplitudes that cancel become exactly zero.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Parts):
+        self.parts = parts
+
+    def __repr__(self) -> str:
+        return f"Sqrt2Complex({self.to_sympy()})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (int, fractions.Fraction)):
+            other = Sqrt2Complex.from_rational(other)
+        if not isinstance(other, Sqrt2Complex):
+            return NotImplemented
+        return self.parts == other.parts
+
+    def __hash__(self) -> int:
+        return hash(self.parts)
+
+    def __add__(self, other: "Sqrt2Complex") -> "Sqrt2Complex":
+        a, b, c, d = self.parts
+        e, f, g, h = other.parts
+        return Sqrt2Complex((a + e, b + f, c + g, d + h))
+
+    def __mul__(self, other: "Sqrt2Complex") -> "Sqrt2Complex":
+        a, b, c, d = self.parts
+        e, f, g, h = other.parts
+        return Sqrt2Complex(
+            (
+                a * e + 2 * b * f - c * g - 2 * d * h,
+                a * f + b * e - c * h - d * g,
+                a * g + 2 * b * h + c * e + 2 * d * f,
+                a * h + b * g + c * f + d * e,
+            )
+        )
+
+    @classmethod
+    def from_rational(cls, value: Union[int, fractions.Fraction]) -> "Sqrt2Complex":
+        zero = fractions.Fraction(0)
+        return cls((fractions.Fraction(value), zero, zero, zero))
+
+    @classmethod
+    def from_sympy(cls, expr: sympy.Basic) -> "Sqrt2Complex":
+        """Converts an exact sympy number such as (1 + I)*sqrt(2)/2
+        Args:
+            expr: A sympy expression built from rationals, sqrt(2) and I. Floats are only
+                accepted if they are whole numbers
+        Returns:
+            The same number
+        """
+        if isinstance(expr, sympy.Rational):
+            return cls.from_rational(fractions.Fraction(int(expr.p), int(expr.q)))
+        if isinstance(expr, sympy.Float) and expr == int(expr):
+            # Such as the -1.0 of y = -1j*b_1 + 1j*b_2, which is exactly -1
+            return cls.from_rational(int(expr))
+        if expr == sympy.I:
+            return _I
+        if isinstance(expr, (sympy.Add, sympy.Mul)):
+            values = [cls.from_sympy(arg) for arg in expr.args]
+            total = values[0]
+            for value in values[1:]:
+                total = total + value if isinstance(expr, sympy.Add) else total * value
+            return total
+        if isinstance(expr, sympy.Pow) and expr.base == 2 and (2 * expr.exp).is_Integer:
+            # 2**(k/2) is 2**floor(k/2), times sqrt(2) when k is odd
+            whole, odd = divmod(int(2 * expr.exp), 2)
+            power = cls.from_rational(fractions.Fraction(2) ** whole)
+            return power * _SQRT2 if odd else power
+        raise ValueError(f"{expr} is not in Q(sqrt(2), i)")
+
+    def to_sympy(self) -> sympy.Expr:
+        a, b, c, d = (sympy.Rational(part.numerator, part.denominator) for part in self.parts)
+        sqrt2 = sympy.sqrt(2)
+        return a + b * sqrt2 + sympy.I * (c + d * sqrt2)
+
+
+_zero, _one = fractions.Fraction(0), fractions.Fraction(1)
+_I = Sqrt2Complex((_zero, _zero, _one, _zero))
+_SQRT2 = Sqrt2Complex((_zero, _one, _zero, _zero))
+
+
+def to_field(operator: SparseOperator) -> SparseOperator:
+    """Converts the matrix elements of an operator to Sqrt2Complex"""
+    columns = {
+        j: {i: Sqrt2Complex.from_sympy(entry) for i, entry in column.items()}
+        for j, column in operator.columns.items()
+    }
+    return SparseOperator(operator.num_qubits, cast(Columns, columns))
+
+
+def factor_to_field(factor: LoweredFactor) -> LoweredFactor:
+    """Converts the operators of every step of a lowered factor to Sqrt2Complex"""
+    return LoweredFactor(
+        factor.num_qubits, [(to_field(operator), targets) for operator, targets in factor.steps]
+    )
+
+
+def state_to_field(state: SparseState) -> SparseState:
+    """Converts the amplitudes of a state to Sqrt2Complex"""
+    amplitudes = {
+        index: Sqrt2Complex.from_sympy(amplitude) for index, amplitude in state.amplitudes.items()
+    }
+    return SparseState(state.num_qubits, cast(Amplitudes, amplitudes))
+
+
+def state_from_field(state: SparseState) -> SparseState:
+    """Converts the Sqrt2Complex amplitudes of a state back to sympy numbers"""
+    amplitudes = {
+        index: cast(Sqrt2Complex, amplitude).to_sympy()
+        for index, amplitude in state.amplitudes.items()
+    }
+    return SparseState(state.num_qubits, amplitudes)
+
+
+def collect_like_terms(expr: sympy.Expr) -> sympy.Expr:
+    """Adds up the coefficients of the terms of a sum that share the same kets and operators.
+
+    sympy only merges terms whose coefficients are numbers, so alpha*|0> + beta*|0> otherwise
+    stays two terms and every later gate is applied to both.
+        Args:
+            expr: A sum of scalars times noncommutative factors
+        Returns:
+            The sum with one term per distinct product of noncommutative factors
+    """
+    return sympy.Add(*[coefficient * product for product, coefficient in _group_terms(expr)])
+
+
+def simplify_coefficients(expr: sympy.Expr) -> sympy.Expr:
+    """Collects like terms and runs sympy.simplify on each of their coefficients"""
+    return sympy.Add(
+        *[sympy.simplify(coefficient) * product for product, coefficient in _group_terms(expr)]
+    )
+
+
+def _group_terms(expr: sympy.Expr) -> List[Tuple[sympy.Expr, sympy.Expr]]:
+    coefficients: Dict[Tuple[sympy.Expr, ...], sympy.Expr] = {}
+    for term in sympy.Add.make_args(expr):
+        c_part, nc_part = term.args_cnc()
+        key = tuple(nc_part)
+        coefficients[key] = coefficients.get(key, sympy.Integer(0)) + sympy.Mul(*c_part)
+    return [(sympy.Mul(*key), coefficient) for key, coefficient in coefficients.items()]
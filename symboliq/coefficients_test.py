@@ -0,0 +1,72 @@
+import fractions
+
+import pytest
+import sympy
+from sympy.physics.quantum.gate import HadamardGate, YGate
+
+from symboliq.coefficients import (
+    Sqrt2Complex,
+    collect_like_terms,
+    factor_to_field,
+    simplify_coefficients,
+    state_from_field,
+    state_to_field,
+    to_field,
+)
+from symboliq.dirac_notation import h, ket_0, ket_1
+from symboliq.operators import GATE_TABLE, lower_factor
+from symboliq.sparse_state import SparseState
+
+
+def test_sqrt2_complex() -> None:
+    half_sqrt2 = Sqrt2Complex.from_sympy(1 / sympy.sqrt(2))
+    assert half_sqrt2 * half_sqrt2 == fractions.Fraction(1, 2)
+    assert half_sqrt2 * half_sqrt2 + half_sqrt2 * half_sqrt2 == 1
+    assert half_sqrt2 + Sqrt2Complex.from_sympy(-sympy.sqrt(2) / 2) == 0
+    assert half_sqrt2 != sympy.Rational(1, 2)
+    assert hash(half_sqrt2) == hash(Sqrt2Complex.from_sympy(sympy.sqrt(2) / 2))
+    assert repr(half_sqrt2) == "Sqrt2Complex(sqrt(2)/2)"
+
+    for expr in [
+        (1 + sympy.I) * sympy.sqrt(2) / 2,
+        sympy.I,
+        -sympy.I / 4,
+        sympy.Integer(2) ** sympy.Rational(3, 2),
+        sympy.Integer(2) ** sympy.Rational(-3, 2),
+        sympy.Integer(4),
+        -1.0 * sympy.I,
+    ]:
+        assert sympy.expand(Sqrt2Complex.from_sympy(expr).to_sympy() - expr) == 0
+    product = Sqrt2Complex.from_sympy(sympy.I * sympy.sqrt(2)) * Sqrt2Complex.from_sympy(
+        3 - sympy.I * sympy.sqrt(2)
+    )
+    assert product.to_sympy() == 2 + 3 * sympy.sqrt(2) * sympy.I
+
+    for expr in [sympy.sqrt(3), sympy.Symbol("alpha"), sympy.Float(0.5)]:
+        with pytest.raises(ValueError, match="is not in Q"):
+            Sqrt2Complex.from_sympy(expr)
+
+
+def test_field_conversions() -> None:
+    field_h = to_field(GATE_TABLE[HadamardGate])
+    assert field_h.columns[1][1] == Sqrt2Complex.from_sympy(-sympy.sqrt(2) / 2)
+    factor = factor_to_field(lower_factor(YGate(0)))
+    assert factor.steps[0][0].columns[0][1] == Sqrt2Complex.from_sympy(sympy.I)
+
+    state = state_to_field(SparseState.from_expr(sympy.sqrt(2) / 2 * (ket_0 + ket_1)))
+    state.apply(field_h, (0,))
+    assert state.amplitudes == {0: Sqrt2Complex.from_rational(1)}
+    assert state_from_field(state) == SparseState(1, {0: sympy.Integer(1)})
+
+
+def test_collect_like_terms() -> None:
+    alpha, beta = sympy.symbols("alpha beta")
+    expr = alpha * ket_0 + beta * ket_0 + (alpha - beta) * ket_1 + beta * ket_1
+    assert len(expr.args) == 4
+    assert collect_like_terms(expr) == (alpha + beta) * ket_0 + alpha * ket_1
+    assert collect_like_terms(h * ket_0) == h * ket_0
+
+    theta = sympy.Symbol("theta")
+    expr = sympy.sin(theta) ** 2 * ket_0 + sympy.cos(theta) ** 2 * ket_0 + alpha * ket_1
+    assert simplify_coefficients(expr - alpha * ket_1) == ket_0
+    assert simplify_coefficients(expr) == ket_0 + alpha * ket_1
@@ -0,0 +1,180 @@
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Union, overload
+
+import sympy
+
+from symboliq import fusion
+from symboliq.dirac_notation import split_product
+from symboliq.operators import (
+    Columns,
+    SparseOperator,
+    Targets,
+    check_register,
+    lower_factor,
+    resolve_targets,
+    to_sparse_matrix,
+)
+from symboliq.parallel import parallel_map
+from symboliq.sparse_state import SparseState
+
+
+class CompiledOperator:
+    """An operator that is converted to sparse form once so that it can be applied to many
+    states without parsing its gates again.
+
+        >> bell = CompiledOperator(cx * TensorProduct(h, i))
+        >> bell(TensorProduct(ket_0, ket_0))
+        sqrt(2)*|0>x|0>/2 + sqrt(2)*|1>x|1>/2
+    """
+
+    def __init__(self, operator: sympy.Expr, fuse: bool = False):
+        """Converts every factor of an operator to its sparse form
+        Args:
+            operator: A product of gates or Dirac notation operators, without a state
+            fuse: Whether to cancel and merge the factors with fusion.fuse once, up front
+        """
+        self._operator = operator
+        self._coefficient, factors = split_product(operator)
+        # The rightmost factor is applied first
+        self._program = [lower_factor(factor) for factor in reversed(factors)]
+        if fuse:
+            self._program = [fusion.fuse(self._program)]
+
+    def __str__(self) -> str:
+        return str(self._operator)
+
+    def __repr__(self) -> str:
+        return f"CompiledOperator({sympy.srepr(self._operator)})"
+
+    def __call__(self, state: sympy.Expr) -> sympy.Expr:
+        """Applies the operator to a state
+        Args:
+            state: A sum of computational basis states
+        Returns:
+            The resulting state as a sympy expression
+        """
+        return self.apply_sparse(SparseState.from_expr(state)).to_expr()
+
+    def apply_sparse(self, state: SparseState) -> SparseState:
+        """Applies the operator to a SparseState, leaving the input unchanged
+        Args:
+            state: The state to apply the operator to
+        Returns:
+            The resulting state
+        """
+        state = state.copy()
+        for factor in self._program:
+            state.apply_factor(factor)
+        state.scale(self._coefficient)
+        return state
+
+    def to_sparse_operator(self, num_qubits: Optional[int] = None) -> SparseOperator:
+        """Composes the factors into the operator on the whole register, one column at a time.
+
+        Each column is the image of a basis state, so every gate only touches the bits of the
+        qubits it acts on and no factor is expanded into a Kronecker product with identities.
+        Only nonzero matrix elements are stored, which fits operators such as permutations and
+        diagonal operators on registers whose dense matrix would not.
+            Args:
+                num_qubits: The size of the register. Factors in Dirac notation fix it, and
+                    otherwise it defaults to one more than the highest qubit a gate acts on
+            Returns:
+                The operator
+        """
+        num_qubits = self._register_size(num_qubits)
+        columns: Columns = {j: {j: sympy.Integer(1)} for j in range(2**num_qubits)}
+        for factor in self._program:
+            check_register(factor, num_qubits)
+            for operator, targets in factor.steps:
+                columns = _apply_to_columns(columns, operator, targets, num_qubits)
+        return SparseOperator(num_qubits, columns).scale(self._coefficient)
+
+    def to_matrix(self, num_qubits: Optional[int] = None) -> sympy.SparseMatrix:
+        """Returns the matrix of the operator as a sympy SparseMatrix, see to_sparse_operator"""
+        return to_sparse_matrix(self.to_sparse_operator(num_qubits))
+
+    def _register_size(self, num_qubits: Optional[int]) -> int:
+        if num_qubits is not None:
+            return num_qubits
+        for factor in self._program:
+            if factor.num_qubits is not None:
+                return factor.num_qubits
+        targets = [
+            target for factor in self._program for _, steps in factor.steps for target in steps
+        ]
+        if not targets:
+            raise ValueError(f"{self._operator} does not act on any qubits")
+        return max(targets) + 1
+
+
+def _apply_to_columns(
+    columns: Columns, operator: SparseOperator, targets: Targets, num_qubits: int
+) -> Columns:
+    # Like SparseState.apply on every column at once, with the image of each local basis state
+    # of the operator spread out to the targeted qubits only once
+    targets = resolve_targets(operator, targets, num_qubits)
+    spread = [
+        sum(((local >> position) & 1) << target for position, target in enumerate(targets[::-1]))
+        for local in range(2 ** len(targets))
+    ]
+    mask = spread[-1]
+    images = {
+        bits: [(spread[row], entry) for row, entry in operator.columns.get(local, {}).items()]
+        for local, bits in enumerate(spread)
+    }
+    new_columns: Columns = {}
+    for j, column in columns.items():
+        new_column: Dict[int, sympy.Expr] = {}
+        collided = False
+        for index, amplitude in column.items():
+            rest = index & ~mask
+            for bits, entry in images[index & mask]:
+                # Most entries of gates are exactly one, which is cheaper to skip than multiply
+                product = amplitude if entry is sympy.S.One else entry * amplitude
+                i = rest | bits
+                if i in new_column:
+                    new_column[i] = new_column[i] + product
+                    collided = True
+                else:
+                    new_column[i] = product
+        if collided:
+            new_column = {i: entry for i, entry in new_column.items() if entry != 0}
+        new_columns[j] = new_column
+    return new_columns
+
+
+@overload
+def qapply_batch(
+    operator: sympy.Expr,
+    states: Iterable[sympy.Expr],
+    lazy: Literal[False] = False,
+    max_workers: int = 1,
+) -> List[sympy.Expr]: ...
+
+
+@overload
+def qapply_batch(
+    operator: sympy.Expr,
+    states: Iterable[sympy.Expr],
+    lazy: Literal[True],
+    max_workers: int = 1,
+) -> Iterator[sympy.Expr]: ...
+
+
+def qapply_batch(
+    operator: sympy.Expr,
+    states: Iterable[sympy.Expr],
+    lazy: bool = False,
+    max_workers: int = 1,
+) -> Union[List[sympy.Expr], Iterator[sympy.Expr]]:
+    """Applies one operator to many states, converting the operator only once
+    Args:
+        operator: A product of gates or Dirac notation operators, without a state
+        states: The states to apply it to
+        lazy: Whether to return an iterator that applies the operator as results are requested
+        max_workers: The number of processes to spread the states over
+    Returns:
+        The resulting states, in the same order as the inputs
+    """
+    compiled_operator = CompiledOperator(operator)
+    results = parallel_map(compiled_operator, states, max_workers, chunksize=16)
+    return results if lazy else list(results)
@@ -0,0 +1,101 @@
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+from sympy.physics.quantum.gate import CNotGate, HadamardGate, XGate, ZGate
+from sympy.physics.quantum.qubit import Qubit
+
+import symboliq
+from symboliq.compiled_operator import CompiledOperator
+from symboliq.dirac_notation import cx, h, i, ket_0, ket_1, x, y
+from symboliq.operators import SparseOperator
+from symboliq.sparse_state import SparseState
+
+bell = cx * TensorProduct(h, i)
+basis = [TensorProduct(a, b) for a in (ket_0, ket_1) for b in (ket_0, ket_1)]
+
+
+def test_str_and_repr() -> None:
+    assert str(CompiledOperator(x)) == "|0><1| + |1><0|"
+    assert repr(CompiledOperator(x)) == f"CompiledOperator({sympy.srepr(x)})"
+
+
+def test_call() -> None:
+    compiled = CompiledOperator(bell)
+    for state in basis:
+        assert compiled(state) == symboliq.qapply(bell * state)
+    assert CompiledOperator(sympy.Rational(1, 2) * x)(ket_0) == ket_1 / 2
+    assert CompiledOperator(XGate(1) * HadamardGate(0))(Qubit("00")) == symboliq.qapply(
+        XGate(1) * HadamardGate(0) * Qubit("00"), backend="sparse"
+    )
+
+
+def test_fuse() -> None:
+    operator = XGate(1) * HadamardGate(0) * XGate(1) * HadamardGate(0) * bell
+    compiled = CompiledOperator(operator, fuse=True)
+    for state in basis:
+        assert compiled(state) == CompiledOperator(operator)(state)
+    assert compiled._program[0].steps == CompiledOperator(bell, fuse=True)._program[0].steps
+
+
+def test_apply_sparse_leaves_input_unchanged() -> None:
+    state = SparseState(1, {0: sympy.Integer(1)})
+    assert CompiledOperator(x).apply_sparse(state) == SparseState(1, {1: sympy.Integer(1)})
+    assert state == SparseState(1, {0: sympy.Integer(1)})
+
+
+def test_to_sparse_operator() -> None:
+    alpha = sympy.Symbol("alpha")
+    for operator in [bell, alpha * TensorProduct(x, y) * cx, XGate(1) * HadamardGate(0) * bell]:
+        matrix = CompiledOperator(operator).to_matrix()
+        assert isinstance(matrix, sympy.SparseMatrix)
+        for j, state in enumerate(basis):
+            column = symboliq.qapply(operator * state, backend="sparse")
+            assert isinstance(column, sympy.Expr)
+            assert SparseState.from_expr(column).amplitudes == {
+                i: matrix[i, j] for i in range(4) if matrix[i, j] != 0
+            }
+
+    # Products that cancel leave no entries behind, and gates default to the smallest register
+    assert CompiledOperator(
+        TensorProduct(i, h * x * h) * CNotGate(1, 0) * ZGate(0)
+    ).to_matrix() == sympy.Matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, -1], [0, 0, -1, 0]])
+    one = sympy.Integer(1)
+    assert CompiledOperator(h * XGate(0) * h).to_sparse_operator() == SparseOperator(
+        1, {0: {0: one}, 1: {1: -one}}
+    )
+    assert CompiledOperator(XGate(0)).to_sparse_operator(2) == SparseOperator(
+        2, {0: {1: one}, 1: {0: one}, 2: {3: one}, 3: {2: one}}
+    )
+    assert CompiledOperator(sympy.Integer(0) * XGate(0)).to_sparse_operator(1) == SparseOperator(
+        1, {}
+    )
+
+
+def test_to_sparse_operator_many_qubits() -> None:
+    # A dense matrix of this size would hold 2^28 entries
+    operator = sympy.Mul(*[CNotGate(k + 1, k) for k in range(13)], XGate(13))
+    columns = CompiledOperator(operator).to_sparse_operator().columns
+    assert len(columns) == 2**14
+    assert all(len(column) == 1 for column in columns.values())
+    assert columns[0] == {2**14 - 1: 1}
+
+
+def test_to_sparse_operator_errors() -> None:
+    with pytest.raises(ValueError, match="does not act on any qubits"):
+        CompiledOperator(sympy.Integer(2)).to_sparse_operator()
+    with pytest.raises(ValueError, match="1 qubit operator cannot act on 2 qubits"):
+        CompiledOperator(x).to_sparse_operator(2)
+
+
+def test_qapply_batch() -> None:
+    expected = [symboliq.qapply(bell * state) for state in basis]
+    assert symboliq.qapply_batch(bell, basis) == expected
+
+    results = symboliq.qapply_batch(bell, iter(basis), lazy=True)
+    assert not isinstance(results, list)
+    assert list(results) == expected
+
+
+def test_qapply_batch_in_parallel() -> None:
+    expected = [symboliq.qapply(bell * state) for state in basis]
+    assert symboliq.qapply_batch(bell, basis, max_workers=2) == expected
@@ -1,12 +1,49 @@
-from typing import Any, List, Union
+import collections
+import functools
+import itertools
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 import sympy
-from sympy import Symbol, srepr
+from sympy import Symbol
 from sympy.core.numbers import Half
 from sympy.physics.quantum import Bra, Dagger, InnerProduct, Ket, OuterProduct, TensorProduct
-from sympy.physics.quantum.gate import HadamardGate, IdentityGate, XGate, YGate, ZGate
+from sympy.physics.quantum.gate import CNotGate, HadamardGate, IdentityGate, XGate, YGate, ZGate
 from sympy.physics.quantum.qubit import Qubit
 
+from symboliq import coefficients as coefficient_policies
+from symboliq import fusion, numeric, stabilizer
+from symboliq.cache import LRUCache
+from symboliq.disk_cache import DiskCache, cache_key
+from symboliq.evaluator import AmplitudeEvaluator
+from symboliq.measurement import Measurement
+from symboliq.operators import (
+    LoweredFactor,
+    basis_label,
+    is_base_symbol,
+    is_integer,
+    lower_factor,
+    lower_operator,
+    register_operator,
+    to_dirac,
+)
+from symboliq.parallel import parallel_map
+from symboliq.profiling import timed
+from symboliq.sparse_state import SparseState
+from symboliq.stabilizer import StabilizerState
 from symboliq.third_party import tensor_product_simp_fork
 
 ket_0 = Ket(0)
@@ -33,9 +70,49 @@ h = (
 i = b_0 + b_3
 cx = TensorProduct(b_0, i) + TensorProduct(b_3, x)
 
-
-def qapply(expr: sympy.Expr) -> Union[sympy.Basic, sympy.Expr]:
-    return DiracNotation(expr).operate_reduce()
+# The Dirac notation equivalents of the sympy gates that the symbolic backend substitutes
+DIRAC_GATES: Dict[Type[sympy.Basic], sympy.Expr] = {
+    IdentityGate: i,
+    XGate: x,
+    YGate: y,
+    ZGate: z,
+    HadamardGate: h,
+}
+
+# Operators that are their own inverse, so that their powers only depend on the exponent's parity
+INVOLUTIONS = {i, x, y, z, h, cx}
+INVOLUTION_GATES = (IdentityGate, XGate, YGate, ZGate, HadamardGate, CNotGate)
+
+# Evaluated <bra|ket> pairs, shared by every DiracNotation
+inner_product_cache: LRUCache[sympy.Expr] = LRUCache(maxsize=4096)
+# Results of DiracNotation._gate_reduce keyed by its argument, used when steps aren't recorded
+gate_reduce_cache: LRUCache[sympy.Expr] = LRUCache(maxsize=4096)
+
+for _operator in (b_0, b_1, b_2, b_3, B_0, B_1, B_2, B_3, x, y, z, h, i, cx):
+    register_operator(_operator)
+
+
+BACKENDS = ("symbolic", "sparse", "numeric", "stabilizer", "auto")
+
+
+def qapply(
+    expr: sympy.Expr,
+    backend: str = "symbolic",
+    max_workers: int = 1,
+    nsimplify: bool = False,
+    fuse: bool = False,
+    coefficients: str = "eager",
+    disk_cache: Optional[DiskCache] = None,
+) -> Union[sympy.Basic, sympy.Expr]:
+    return DiracNotation(
+        expr,
+        backend=backend,
+        max_workers=max_workers,
+        nsimplify=nsimplify,
+        fuse=fuse,
+        coefficients=coefficients,
+        disk_cache=disk_cache,
+    ).operate_reduce()
 
 
 def get_simp_steps(expr: sympy.Expr) -> str:
@@ -43,11 +120,81 @@ def get_simp_steps(expr: sympy.Expr) -> str:
 
 
 class DiracNotation:
-    steps: List[sympy.Expr] = []
     base_symbols = [B_0, B_1, B_2, B_3]
 
-    def __init__(self, expr: sympy.Expr):
+    def __init__(
+        self,
+        expr: sympy.Expr,
+        backend: str = "symbolic",
+        max_workers: int = 1,
+        nsimplify: bool = False,
+        record_steps: bool = False,
+        max_steps: Optional[int] = None,
+        fuse: bool = False,
+        coefficients: str = "eager",
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        """Wraps an expression in Dirac notation so that it can be simplified
+        Args:
+            expr: The expression to simplify
+            backend: "symbolic" rewrites the whole expression with every gate and records the
+                steps it takes, except that operators on two or more qubits are applied to sums
+                of basis states one tensor factor at a time. "sparse" keeps the state as a map
+                from computational basis states to amplitudes and only converts it back to sympy
+                at the end. "numeric" simulates a NumPy state vector, which only works without
+                free symbols.
+                "stabilizer" runs products of I, X, Y, Z, H and CNOT gates applied to a basis
+                state on a stabilizer tableau, which scales to many more qubits, and anything
+                else on the sparse backend. "auto" picks "numeric" for expressions without free
+                symbols and "sparse" otherwise
+            max_workers: The number of processes that the terms of a sum are reduced in.
+                The default of 1 reduces them one after the other in this process
+            nsimplify: Whether the numeric backend converts its floating point amplitudes
+                back to exact ones such as sqrt(2)/2
+            record_steps: Whether operate_reduce keeps the intermediate expressions of the
+                symbolic backend in self.steps. get_steps and get_steps_latex always do
+            max_steps: How many of the most recent steps to keep, all of them by default. The
+                steps get_steps renders keep the numbers they would have had if none were dropped
+            fuse: Whether the sparse and numeric backends cancel and merge the operators of each
+                product with fusion.fuse before applying them to its state. The symbolic backend
+                can't, and raises a ValueError instead
+            coefficients: How the amplitudes are simplified. "eager" leaves it to sympy's
+                canonicalization of every product. "collect" also adds up the coefficients of
+                like terms after every gate. "deferred" does that and runs sympy.simplify on
+                each coefficient once, at the end. "field" makes the sparse backend, which
+                the stabilizer backend falls back to, compute
+                with exact elements of Q(sqrt(2), i), which covers Clifford and Hadamard
+                circuits on basis states
+            disk_cache: Where operate_reduce looks up its result, and stores it together with
+                the steps if they are being recorded, so that it is only computed once across
+                processes and runs
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        if coefficients not in coefficient_policies.POLICIES:
+            raise ValueError(
+                f"Unknown coefficient policy {coefficients!r}, "
+                f"expected one of {coefficient_policies.POLICIES}"
+            )
+        if backend == "auto":
+            backend = "sparse" if _has_free_symbols(expr) else "numeric"
+        if coefficients == "field" and backend not in ("sparse", "stabilizer"):
+            raise ValueError("The field coefficient policy needs the sparse backend")
+        if fuse and backend == "symbolic":
+            raise ValueError("Fusing operators needs the sparse or numeric backend")
         self._expr = expr
+        self._backend = backend
+        self._nsimplify = nsimplify
+        self._fuse = fuse
+        self._coefficients = coefficients
+        self._disk_cache = disk_cache
+        self._recording_steps = record_steps
+        self._max_steps = max_steps
+        self.steps: Deque[sympy.Expr] = collections.deque(maxlen=max_steps)
+        # How many of the oldest steps max_steps has dropped, so the kept ones keep their numbers
+        self._num_dropped_steps = 0
+        self._on_step: Optional[Callable[[sympy.Expr], None]] = None
+        self._max_workers = max_workers
         self._num_qubits = _count_number_of_tensor_products(expr) + 1
 
     def __str__(self) -> str:
@@ -56,15 +203,70 @@ class DiracNotation:
     def __repr__(self) -> str:
         return sympy.srepr(self._expr)
 
-    def _get_steps_as_list(self) -> List[sympy.Expr]:
-        self.steps = []
-        self.steps.append(self._expr)
-        self.operate_reduce()
-        expr_list = []
-        for i in self.steps:
-            expr_list.append(i)
+    @functools.cached_property
+    def _uses_complex_symbols(self) -> bool:
+        # Computed once per instance rather than on every call of operate_reduce
+        return timed("complex_symbol_check", _has_complex_symbols, self._expr)
+
+    def _record_step(self, expr: sympy.Expr) -> None:
+        if self._recording_steps:
+            if len(self.steps) == self.steps.maxlen:
+                self._num_dropped_steps += 1
+            self.steps.append(expr)
+            if self._on_step is not None:
+                self._on_step(expr)
+
+    def _get_steps_as_list(self, max_steps: Optional[int] = None) -> List[sympy.Expr]:
+        recording_steps = self._recording_steps
+        self.steps = collections.deque(maxlen=self._max_steps if max_steps is None else max_steps)
+        self._num_dropped_steps = 0
+        self._recording_steps = True
+        try:
+            self._record_step(self._expr)
+            self.operate_reduce()
+        finally:
+            self._recording_steps = recording_steps
+        return list(self.steps)
+
+    def iter_steps(self, latex: bool = False, max_workers: int = 1) -> Iterator[str]:
+        """Simplifies the whole expression, keeping every step, on the first call to next() and
+        then renders the steps one at a time, so that the rendered output never has to be built
+        as one string. The first step is only yielded once the simplification has finished, so
+        use write_steps to output each step as soon as it is reached without keeping the steps
+            Args:
+                latex: Whether to render the steps like get_steps_latex instead of get_steps
+                max_workers: The number of processes to render latex in
+            Returns:
+                    An iterator over the rendered steps
+        """
+        expr_list = self._get_steps_as_list()
+        start = self._num_dropped_steps
+        if latex:
+            rendered = parallel_map(sympy.latex, expr_list, max_workers, chunksize=16)
+            for k, l in enumerate(rendered, start):
+                yield rf"({k}) \quad {l} \\"
+        else:
+            for k, l in enumerate(expr_list, start):
+                yield f"({k}) {l}\n"
+
+    def write_steps(self, stream: TextIO, latex: bool = False) -> None:
+        """Writes every step to a stream as soon as the simplification reaches it, without
+        keeping the steps in memory
+            Args:
+                stream: A file-like object such as an open file or sys.stdout
+                latex: Whether to render the steps like get_steps_latex instead of get_steps
+        """
+        numbers = itertools.count()
+
+        def write_step(expr: sympy.Expr) -> None:
+            k = next(numbers)
+            stream.write(rf"({k}) \quad {sympy.latex(expr)} \\" if latex else f"({k}) {expr}\n")
 
-        return expr_list
+        self._on_step = write_step
+        try:
+            self._get_steps_as_list(max_steps=0)
+        finally:
+            self._on_step = None
 
     def get_steps(self) -> str:
         """Returns the steps the program went through to simplify
@@ -72,11 +274,7 @@ class DiracNotation:
             Returns:
                     The steps as a string
         """
-        expr_list = self._get_steps_as_list()
-        plain_str: str = ""
-        for k, l in enumerate(expr_list):
-            plain_str = plain_str + f"({k}) {l}\n"
-        return plain_str
+        return "".join(self.iter_steps())
 
     def get_steps_latex(self) -> str:
         """Returns the steps the program went through to simplify
@@ -90,11 +288,7 @@ class DiracNotation:
             Returns:
                     The steps represented in latex notation as a string
         """
-        expr_list = self._get_steps_as_list()
-        latex_str: str = ""
-        for k, l in enumerate(expr_list):
-            latex_str = latex_str + rf"({k}) \quad {sympy.latex(l)} \\"
-        return latex_str
+        return "".join(self.iter_steps(latex=True))
 
     def _mul_reduce(self, arg: sympy.Expr, add_step: bool) -> sympy.Expr:
         brakets = []
@@ -106,12 +300,14 @@ class DiracNotation:
                 brakets.append(term)
             elif isinstance(term, InnerProduct):
                 if add_step:
-                    self.steps.append(arg)
+                    self._record_step(arg)
                 new_term = new_term * self._gate_reduce(term, add_step) * args[1]
                 if add_step:
-                    self.steps.append(new_term)
+                    self._record_step(new_term)
                 return new_term
-            elif isinstance(term, (Half, sympy.Pow, sympy.Rational)):
+            elif isinstance(term, (Half, sympy.Pow, sympy.Rational)) or (
+                term.is_commutative and term.free_symbols
+            ):
                 constants.append(term)
 
         calc = self._gate_reduce(brakets[0].args[0] * (brakets[0].args[1] * brakets[1]), add_step)
@@ -129,8 +325,9 @@ class DiracNotation:
 
     def _tensor_reduce(self, arg: sympy.Expr, add_step: bool) -> sympy.Expr:
         final_state_vec = sympy.Integer(0)
-        mes = tensor_product_simp_fork(arg.expand(tensorproduct=True))
-        mes = _factor_tensor(mes, self._num_qubits)
+        expanded = timed("expand_tensor_product", sympy.expand, arg, tensorproduct=True)
+        mes = timed("tensor_product_simp_fork", tensor_product_simp_fork, expanded)
+        mes = timed("factor_tensor", _factor_tensor, mes, self._num_qubits)
         for i in mes:
             tansors = []
             for j in i:
@@ -140,6 +337,12 @@ class DiracNotation:
         return final_state_vec
 
     def _gate_reduce(self, arg: sympy.Expr, add_step: bool) -> sympy.Expr:
+        if self._recording_steps:
+            # A cached result would skip the steps that computing it records
+            return self._gate_reduce_uncached(arg, add_step)
+        return gate_reduce_cache.lookup(arg, lambda: self._gate_reduce_uncached(arg, add_step))
+
+    def _gate_reduce_uncached(self, arg: sympy.Expr, add_step: bool) -> sympy.Expr:
         if isinstance(arg, InnerProduct):
             return _base_reduce(arg)
 
@@ -149,13 +352,13 @@ class DiracNotation:
 
         elif _check_pauli_hadamard(arg):
 
-            arg = _sub_pauli_hadamard(arg)
+            arg = timed("sub_pauli_hadamard", _sub_pauli_hadamard, arg)
 
             # Distributivity of matrix multiplication over addition
-            arg = arg.expand()
-            self.steps.append(arg)
+            arg = timed("expand", sympy.expand, arg)
+            self._record_step(arg)
             arg = self._gate_reduce(arg, add_step=False)
-            self.steps.append(arg)
+            self._record_step(arg)
             return arg
 
         elif (
@@ -175,8 +378,93 @@ class DiracNotation:
             Returns:
                 The simplified expression
         """
+        if self._disk_cache is None:
+            return self._reduce()
+        return self._cached_reduce(self._disk_cache)
+
+    def lambdify(
+        self, symbols: Optional[Sequence[sympy.Symbol]] = None, cse: bool = True
+    ) -> AmplitudeEvaluator:
+        """Simplifies the expression once and compiles the amplitudes of the result to a NumPy
+        function, which evaluates them at many parameter values far faster than subs and evalf.
+        The symbolic backend simplifies on the sparse backend instead
+
+            Args:
+                symbols: The arguments of the evaluator, in order. By default, the free symbols
+                    of the amplitudes sorted by name
+                cse: Whether subexpressions shared between the amplitudes are computed only once
+            Returns:
+                A function from arrays of parameter values to arrays of amplitudes
+        """
+        return AmplitudeEvaluator(self._amplitudes(), symbols, cse=cse)
+
+    def measure(self) -> Measurement:
+        """Simplifies the expression for measuring the result in the computational basis, on
+        the sparse backend if the backend is symbolic
+
+        Returns:
+            The probabilities of the outcomes, from which shots can be drawn
+        """
+        return Measurement(self._amplitudes())
+
+    def _amplitudes(self) -> SparseState:
+        # The symbolic backend rewrites expressions rather than tracking amplitudes, and drops
+        # some of them, such as the phase of Y|1>
+        if self._backend == "symbolic":
+            return self.sparse_reduce()
+        return SparseState.from_expr(cast(sympy.Expr, self.operate_reduce()))
+
+    def _cached_reduce(self, disk_cache: DiskCache) -> Union[sympy.Basic, sympy.Expr]:
+        key = cache_key(
+            self._expr,
+            backend=self._backend,
+            nsimplify=self._nsimplify,
+            fuse=self._fuse,
+            coefficients=self._coefficients,
+        )
+        cached = disk_cache.get(key)
+        # An entry stored without steps can't replay them, so it is recomputed when they're needed
+        if cached is not None and (cached.steps is not None or not self._recording_steps):
+            for step in cached.steps or []:
+                self._record_step(step)
+            return cached.result
+
+        steps: List[sympy.Expr] = []
+        on_step = self._on_step
+
+        def record_step(expr: sympy.Expr) -> None:
+            steps.append(expr)
+            if on_step is not None:
+                on_step(expr)
+
+        self._on_step = record_step
+        try:
+            result = self._reduce()
+        finally:
+            self._on_step = on_step
+        disk_cache.put(key, result, steps if self._recording_steps else None)
+        return result
+
+    def _reduce(self) -> Union[sympy.Basic, sympy.Expr]:
+        if self._backend == "stabilizer":
+            tableau = self.stabilizer_reduce()
+            if tableau is not None:
+                return tableau.to_expr()
+        if self._backend in ("sparse", "stabilizer"):
+            return self.sparse_reduce().to_expr()
+        if self._backend == "numeric":
+            return self.numeric_reduce().to_expr()
+        state = self._symbolic_reduce()
+        assert isinstance(state, sympy.Expr)
+        if self._coefficients == "deferred":
+            return timed("simplify_coefficients", coefficient_policies.simplify_coefficients, state)
+        if self._coefficients == "collect":
+            # The terms of a sum are reduced separately, so their like terms meet only here
+            return timed("collect_like_terms", coefficient_policies.collect_like_terms, state)
+        return state
 
-        if "complex=True" in srepr(self._expr):
+    def _symbolic_reduce(self) -> Union[sympy.Basic, sympy.Expr]:
+        if self._uses_complex_symbols:
             expr = sympy.physics.quantum.qapply(self._expr)
         else:
             expr = self._expr
@@ -184,8 +472,11 @@ class DiracNotation:
             return self.handle_mul(expr)
         elif isinstance(expr, sympy.Add):
             state = sympy.Integer(0)
-            for j in expr.args:
-                state = state + self.handle_mul(j)
+            tasks = [(term, self._recording_steps, self._coefficients) for term in expr.args]
+            for term_state, steps in parallel_map(_handle_mul, tasks, self._max_workers):
+                state = state + term_state
+                for step in steps:
+                    self._record_step(step)
         return state
 
     def handle_mul(self, expr: sympy.Expr) -> Union[sympy.Basic, sympy.Expr]:
@@ -193,23 +484,276 @@ class DiracNotation:
         state = rev_args[0]
         for i in range(1, len(rev_args)):
             rev_args_by_index = rev_args[i]
-            if isinstance(rev_args_by_index, sympy.Pow):
-                exp = rev_args_by_index.exp
-                base = rev_args_by_index.base
-                for _ in range(exp):
-                    state = self._gate_reduce(base * state, True)
+            if (
+                isinstance(rev_args_by_index, Symbol)
+                and isinstance(state, Ket)
+                and _is_complex_symbol(rev_args_by_index)
+            ):
+                return rev_args_by_index * state
+            assert isinstance(state, sympy.Expr)
+            if _is_scalar(rev_args_by_index):
+                # Multiplied into every term, from which apply_operator takes it off again
+                terms = sympy.Add.make_args(state)
+                state = sympy.Add(*[rev_args_by_index * term for term in terms])
+                continue
+            state = self.apply_operator(cast(sympy.Expr, rev_args_by_index), state)
+        return state
 
-            else:
-                if (
-                    isinstance(rev_args_by_index, Symbol)
-                    and isinstance(state, Ket)
-                    and "complex=True" in srepr(rev_args_by_index)
-                ):
-                    return rev_args_by_index * state
-                assert hasattr(rev_args_by_index, "__mul__")
-                state = self._gate_reduce(rev_args_by_index * state, True)
+    def apply_operator(self, operator: sympy.Expr, state: sympy.Expr) -> sympy.Expr:
+        """Applies one factor of a product, such as a gate, a power of a gate or a scalar, to a
+        simplified state, which is one step of handle_mul
+        Args:
+            operator: The factor to apply
+            state: The state to apply it to
+        Returns:
+            The simplified result
+        """
+        coefficient, factors = split_product(state)
+        if coefficient != 1 and factors:
+            # The symbolic rules expect a scalar on a single state to come first, not after a gate
+            return coefficient * self.apply_operator(operator, sympy.Mul(*factors))
+        applied = timed("apply_factorwise", self._apply_factorwise, state, operator)
+        if applied is not None:
+            state = applied
+        elif isinstance(operator, sympy.Pow):
+            state = self._power_reduce(operator.base, operator.exp, state)
+        else:
+            assert hasattr(operator, "__mul__")
+            state = self._gate_reduce(operator * state, True)
+        if self._coefficients in ("collect", "deferred"):
+            state = timed("collect_like_terms", coefficient_policies.collect_like_terms, state)
+        return state
+
+    def _apply_factorwise(self, state: sympy.Expr, operator: sympy.Expr) -> Optional[sympy.Expr]:
+        """Applies an operator on two or more qubits, such as a layer of gates or cx, to a sum of
+        computational basis states one tensor factor at a time, like the sparse backend does,
+        instead of expanding it across every factor of the state
+        Args:
+            state: The state to apply the operator to
+            operator: An operator in Dirac notation
+        Returns:
+            The resulting state, or None if the operator acts on a single qubit or either of
+            them can't be lowered
+        """
+        try:
+            factor = lower_factor(operator)
+            if factor.num_qubits is None or factor.num_qubits < 2:
+                return None
+            sparse_state = SparseState.from_expr(state)
+            sparse_state.apply_factor(factor)
+        except ValueError:
+            return None
+        result = sparse_state.to_expr()
+        self._record_step(result)
+        return result
+
+    def _power_reduce(self, base: sympy.Expr, exp: sympy.Expr, state: sympy.Expr) -> sympy.Expr:
+        """Applies base**exp to a state. Involutions are reduced once at most, and other operators
+        are lowered and raised to the power by squaring, then applied to the state in one go
+        Args:
+            base: The operator
+            exp: An integer exponent, which may be symbolic if the operator is an involution
+            state: The state to apply the power to
+        Returns:
+            The resulting state
+        """
+        if _is_involution(base) and is_integer(exp):
+            sign = (-1) ** exp
+            if sign == 1:
+                return state
+            flipped = self._gate_reduce(base * state, True)
+            if sign == -1:
+                return flipped
+            return (1 + sign) / 2 * state + (1 - sign) / 2 * flipped
+
+        operator, targets = lower_operator(sympy.Pow(base, exp, evaluate=False))
+        try:
+            sparse_state = SparseState.from_expr(state)
+        except ValueError:
+            if targets is not None:
+                raise
+            # States such as |psi> are reduced against the power written out as outer products
+            return self._gate_reduce(to_dirac(operator) * state, True)
+        sparse_state.apply(operator, targets)
+        result = sparse_state.to_expr()
+        self._record_step(result)
+        return result
+
+    def sparse_reduce(self) -> SparseState:
+        """Simplifies the expression on a map from computational basis states to amplitudes
+        instead of a sympy expression tree
+
+            Returns:
+                The simplified state
+        """
+        terms = self._expr.args if isinstance(self._expr, sympy.Add) else (self._expr,)
+        tasks = [(term, self._fuse, self._coefficients) for term in terms]
+        term_states = parallel_map(_handle_mul_sparse, tasks, self._max_workers)
+        state = next(term_states)
+        for term_state in term_states:
+            state.add(term_state)
+        if self._coefficients == "deferred":
+            simplified = {
+                index: sympy.simplify(amplitude) for index, amplitude in state.amplitudes.items()
+            }
+            state.amplitudes = {
+                index: amplitude for index, amplitude in simplified.items() if amplitude != 0
+            }
+        return state
+
+    def stabilizer_reduce(self) -> Optional[StabilizerState]:
+        """Simplifies a product of I, X, Y, Z, H and CNOT gates applied to a computational basis
+        state on a stabilizer tableau, in time polynomial in the number of qubits
+
+        Returns:
+            The state, which only lists its amplitudes when asked to, or None if the
+            expression is not such a product
+        """
+        if isinstance(self._expr, sympy.Add):
+            return None
+        coefficient, operators = split_product(self._expr)
+        if not operators:
+            return None
+        state = SparseState.from_expr(operators[-1])
+        factors = self._lower_factors(operators[-2::-1])
+        if len(state.amplitudes) != 1 or not stabilizer.is_clifford(factors):
+            return None
+        tableau = StabilizerState.from_sparse_state(state)
+        for factor in factors:
+            tableau.apply_factor(factor)
+        tableau.coefficient *= coefficient
+        return tableau
+
+    def numeric_reduce(self) -> SparseState:
+        """Simplifies an expression without free symbols on a NumPy state vector
+
+        Returns:
+            The simplified state, with floating point amplitudes unless nsimplify was set
+        """
+        terms = self._expr.args if isinstance(self._expr, sympy.Add) else (self._expr,)
+        tasks = [(term, self._fuse) for term in terms]
+        term_vectors = parallel_map(_handle_mul_numeric, tasks, self._max_workers)
+        num_qubits, vector = next(term_vectors)
+        for term_num_qubits, term_vector in term_vectors:
+            if term_num_qubits != num_qubits:
+                raise ValueError(f"{self._expr} adds states of different numbers of qubits")
+            vector = vector + term_vector
+        return numeric.from_vector(vector, num_qubits, nsimplify=self._nsimplify)
+
+    def handle_mul_numeric(self, expr: sympy.Expr) -> Tuple[int, numeric.Vector]:
+        """Applies the operators of a product right to left to a state vector
+        Args:
+            expr: A product of scalars and operators ending in a state
+        Returns:
+            The number of qubits and the resulting state vector
+        """
+        coefficient, operators = split_product(expr)
+        if not operators:
+            raise ValueError(f"{expr} does not contain a state")
+
+        state = SparseState.from_expr(operators[-1])
+        vector = numeric.to_vector(state)
+        for factor in self._lower_factors(operators[-2::-1]):
+            vector = numeric.apply_factor(vector, state.num_qubits, factor)
+        return state.num_qubits, complex(coefficient) * vector
+
+    def handle_mul_sparse(self, expr: sympy.Expr) -> SparseState:
+        """Applies the operators of a product right to left to the state at its end
+        Args:
+            expr: A product of scalars and operators ending in a state
+        Returns:
+            The resulting state
+        """
+        coefficient, operators = split_product(expr)
+        if not operators:
+            raise ValueError(f"{expr} does not contain a state")
+
+        state = SparseState.from_expr(operators[-1])
+        factors = self._lower_factors(operators[-2::-1])
+        if self._coefficients == "field":
+            state = coefficient_policies.state_to_field(state)
+            factors = [coefficient_policies.factor_to_field(factor) for factor in factors]
+        for factor in factors:
+            state.apply_factor(factor)
+        if self._coefficients == "field":
+            state = coefficient_policies.state_from_field(state)
+        state.scale(coefficient)
         return state
 
+    def _lower_factors(self, operators: Sequence[sympy.Expr]) -> List[LoweredFactor]:
+        factors = [lower_factor(operator) for operator in operators]
+        return [fusion.fuse(factors)] if self._fuse else factors
+
+
+def _handle_mul(
+    task: Tuple[sympy.Expr, bool, str],
+) -> Tuple[Union[sympy.Basic, sympy.Expr], List[sympy.Expr]]:
+    # Runs in worker processes, so it returns the steps instead of recording them
+    expr, record_steps, coefficients = task
+    dirac_notation = DiracNotation(expr, record_steps=record_steps, coefficients=coefficients)
+    return dirac_notation.handle_mul(expr), list(dirac_notation.steps)
+
+
+def _handle_mul_sparse(task: Tuple[sympy.Expr, bool, str]) -> SparseState:
+    expr, fuse, coefficients = task
+    dirac_notation = DiracNotation(expr, backend="sparse", fuse=fuse, coefficients=coefficients)
+    return dirac_notation.handle_mul_sparse(expr)
+
+
+def _handle_mul_numeric(task: Tuple[sympy.Expr, bool]) -> Tuple[int, numeric.Vector]:
+    expr, fuse = task
+    return DiracNotation(expr, backend="numeric", fuse=fuse).handle_mul_numeric(expr)
+
+
+def _has_free_symbols(expr: sympy.Expr) -> bool:
+    # Kets and bras count as free symbols too, but only scalar symbols block the numeric backend
+    return any(
+        isinstance(symbol, Symbol) and not is_base_symbol(symbol) for symbol in expr.free_symbols
+    )
+
+
+def _is_involution(expr: sympy.Basic) -> bool:
+    if isinstance(expr, TensorProduct):
+        return all(_is_involution(arg) for arg in expr.args)
+    return expr in INVOLUTIONS or isinstance(expr, INVOLUTION_GATES)
+
+
+def _is_scalar(expr: sympy.Basic) -> bool:
+    # Scalars such as alpha, cos(theta) or 1/sqrt(2), which the symbolic rules cannot reduce
+    # against a state, but not operators such as x, which don't commute
+    return (
+        bool(expr.is_commutative)
+        and not isinstance(expr, InnerProduct)
+        and not is_base_symbol(expr)
+    )
+
+
+def _is_complex_symbol(symbol: Symbol) -> bool:
+    # Only symbols created with complex=True, i.e. the ones srepr prints that assumption for
+    return symbol._assumptions_orig.get("complex") is True  # type: ignore[attr-defined]
+
+
+def _has_complex_symbols(expr: sympy.Expr) -> bool:
+    return any(_is_complex_symbol(symbol) for symbol in expr.atoms(Symbol))
+
+
+def split_product(expr: sympy.Expr) -> Tuple[sympy.Expr, List[sympy.Expr]]:
+    """Separates a product into its scalar coefficient and its operators and states
+    Args:
+        expr: A product such as 1/2 * B_0 * x * |0>
+    Returns:
+        The coefficient, with any inner products evaluated, and the remaining factors in order
+    """
+    factors = expr.args if isinstance(expr, sympy.Mul) else (expr,)
+    scalars = []
+    operators = []
+    for factor in factors:
+        if factor.is_commutative and not is_base_symbol(factor):
+            scalars.append(_base_reduce(factor) if isinstance(factor, InnerProduct) else factor)
+        else:
+            operators.append(factor)
+    return sympy.Mul(*scalars), operators
+
 
 def _check_pauli_hadamard(expr: sympy.Expr) -> bool:
     """Tells you whether an expression contains at least one Pauli or Hadamard gate
@@ -220,7 +764,7 @@ def _check_pauli_hadamard(expr: sympy.Expr) -> bool:
          False otherwise
     """
     pauli_and_hadamard_dirac = [i, x, z, h]
-    pauli_and_hadamard_gates = (IdentityGate, XGate, YGate, ZGate, HadamardGate)
+    pauli_and_hadamard_gates = tuple(DIRAC_GATES)
     return any(item in pauli_and_hadamard_dirac for item in list(expr.args)) or any(
         isinstance(item, pauli_and_hadamard_gates) for item in list(expr.args)
     )
@@ -228,24 +772,14 @@ def _check_pauli_hadamard(expr: sympy.Expr) -> bool:
 
 def _sub_pauli_hadamard(arg: sympy.Expr) -> sympy.Expr:
     """Looks through an expression and replaced pauli and hadamard sympy gates with their
-    dirac notation equivalents
+    dirac notation equivalents in a single pass
         Args:
             Any sympy expression
         Returns:
             Another sympy expression
     """
-    for a in arg.args:
-        if isinstance(a, IdentityGate):
-            arg = arg.subs(a, i)
-        elif isinstance(a, XGate):
-            arg = arg.subs(a, x)
-        elif isinstance(a, YGate):
-            arg = arg.subs(a, y)
-        elif isinstance(a, ZGate):
-            arg = arg.subs(a, z)
-        elif isinstance(a, HadamardGate):
-            arg = arg.subs(a, h)
-    return arg
+    replacements = {a: DIRAC_GATES[type(a)] for a in arg.args if type(a) in DIRAC_GATES}
+    return arg.xreplace(replacements)
 
 
 def _count_number_of_kets_and_bras(arg: sympy.Mul) -> int:
@@ -266,27 +800,35 @@ def _count_number_of_tensor_products(arg: sympy.Expr) -> int:
     return count
 
 
-def _base_reduce(inner_product: sympy.physics.quantum.InnerProduct) -> sympy.Integer:
+def _base_reduce(inner_product: InnerProduct) -> sympy.Expr:
     """Expressions like Bra(0) * Ket(0).doit()) evaluate to <0|0> when they
-    should be evaluating to 1. This function bypasses that limitation
+    should be evaluating to 1. This function bypasses that limitation and remembers
+    the result in inner_product_cache
                Args:
-                   inner_product: has to be a <b|k> where b and k are either 1 or 0
+                   inner_product: <b|k> where b and k are usually computational basis
+                   states such as 0, 1 or Qubit("01")
                Returns:
                    The evaluated inner product
     """
-    same_bras_and_kets = [Bra(0) * Ket(0), Bra(0) * Qubit(0), Bra(1) * Ket(1), Bra(1) * Qubit(1)]
-    different_bras_and_kets = [
-        Bra(0) * Ket(1),
-        Bra(1) * Ket(0),
-        Bra(0) * Qubit(1),
-        Bra(1) * Qubit(0),
-    ]
-    assert inner_product in same_bras_and_kets + different_bras_and_kets
-
-    if inner_product in same_bras_and_kets:
+    return inner_product_cache.lookup(
+        inner_product, lambda: timed("inner_product", _evaluate_inner_product, inner_product)
+    )
+
+
+def _evaluate_inner_product(inner_product: InnerProduct) -> sympy.Expr:
+    bra = inner_product.bra
+    ket = inner_product.ket
+    if bra.label == ket.label:
         return sympy.Integer(1)
-    else:
-        return sympy.Integer(0)
+    try:
+        bra_label = basis_label(bra)
+        ket_label = basis_label(ket)
+    except ValueError:
+        # Nothing is known about the overlap of two different arbitrary states
+        return inner_product
+    if len(bra_label) != len(ket_label):
+        raise ValueError(f"{inner_product} is between states of different numbers of qubits")
+    return sympy.Integer(bra_label == ket_label)
 
 
 def _factor_tensor(expr: Any, state_space: int) -> Any:
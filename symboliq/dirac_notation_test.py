@@ -1,6 +1,19 @@
+import io
+
+import numpy as np
+import pytest
+import sympy
 from sympy import Symbol, sqrt
-from sympy.physics.quantum import TensorProduct
-from sympy.physics.quantum.gate import HadamardGate, IdentityGate, XGate, YGate, ZGate
+from sympy.physics.quantum import Bra, InnerProduct, Ket, TensorProduct
+from sympy.physics.quantum.gate import (
+    CNotGate,
+    HadamardGate,
+    IdentityGate,
+    TGate,
+    XGate,
+    YGate,
+    ZGate,
+)
 from sympy.physics.quantum.qubit import Qubit
 
 import symboliq
@@ -8,17 +21,25 @@ from symboliq.dirac_notation import (
     B_0,
     B_1,
     DiracNotation,
+    _base_reduce,
+    _has_complex_symbols,
+    b_0,
     b_1,
     b_2,
     b_3,
     bra_0,
     cx,
+    gate_reduce_cache,
+    get_simp_steps,
     h,
     i,
+    inner_product_cache,
     ket_0,
     ket_1,
     x,
+    y,
 )
+from symboliq.stabilizer import StabilizerState
 
 
 def test_str() -> None:
@@ -162,3 +183,400 @@ def test_assert_x_gate_on_alpha_and_beta() -> None:
     state = x * (alpha * ket_0 + beta * ket_1)
 
     assert str(DiracNotation(state).operate_reduce()) == "alpha*|1> + beta*|0>"
+
+
+def test_numeric_scalar_factors() -> None:
+    assert symboliq.qapply(1 / sqrt(2) * x * ket_0) == sqrt(2) / 2 * ket_1
+    assert symboliq.qapply(sympy.Rational(1, 2) * x * ket_0) == ket_1 / 2
+    assert symboliq.qapply(sympy.I * x * ket_0) == sympy.I * ket_1
+    assert symboliq.qapply(x * (1 / sqrt(2)) * h * ket_0) == ket_0 / 2 + ket_1 / 2
+
+
+def test_sparse_backend() -> None:
+    alpha = Symbol("alpha", complex=True)
+    beta = Symbol("beta", complex=True)
+    for expr in [
+        B_0 * ket_0,
+        b_2 * ket_0,
+        h * ket_1,
+        i * x * x * ket_0,
+        bra_0 * ket_0 * ket_1,
+        x * (alpha * ket_0 + beta * ket_1),
+        cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0),
+        TensorProduct(cx, i) * TensorProduct(h, i, i) * TensorProduct(ket_0, ket_0, ket_0),
+        XGate(0) * Qubit("0") + ZGate(0) * Qubit("1"),
+    ]:
+        assert symboliq.qapply(expr, backend="sparse") == DiracNotation(expr).operate_reduce()
+
+    assert symboliq.qapply(YGate(0) * Qubit("1"), backend="sparse") == -sympy.I * ket_0
+    assert symboliq.qapply(
+        CNotGate(1, 0) * HadamardGate(1) * Qubit("00"), backend="sparse"
+    ) == sqrt(2) / 2 * TensorProduct(ket_0, ket_0) + sqrt(2) / 2 * TensorProduct(ket_1, ket_1)
+
+    # Identity factors are skipped, so this touches two amplitudes rather than a 2^24 operator
+    expr = TensorProduct(h, *[i] * 23) * TensorProduct(*[ket_0] * 24)
+    assert symboliq.qapply(expr, backend="sparse") == sqrt(2) / 2 * TensorProduct(
+        *[ket_0] * 24
+    ) + sqrt(2) / 2 * TensorProduct(ket_1, *[ket_0] * 23)
+
+
+def test_sparse_backend_errors() -> None:
+    with pytest.raises(ValueError, match="Unknown backend"):
+        DiracNotation(ket_0, backend="dense")
+    with pytest.raises(ValueError, match="does not contain a state"):
+        symboliq.qapply(Symbol("a") + ket_0, backend="sparse")
+
+
+def test_inner_product_cache() -> None:
+    inner_product_cache.clear()
+    with gate_reduce_cache.disabled():
+        assert DiracNotation(b_1 * ket_1).operate_reduce() == ket_0
+        assert DiracNotation(b_1 * ket_1).operate_reduce() == ket_0
+    info = inner_product_cache.info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+    assert _base_reduce(Bra("01") * Qubit("01")) == 1
+    assert _base_reduce(Bra("01") * Qubit("11")) == 0
+    assert _base_reduce(Bra("psi") * Ket("psi")) == 1
+    assert _base_reduce(Bra("psi") * Ket("phi")) == Bra("psi") * Ket("phi")
+    with pytest.raises(ValueError, match="different numbers of qubits"):
+        _base_reduce(Bra(0) * Qubit("01"))
+
+
+def test_parallel_reduce() -> None:
+    expr = h * ket_0 + x * ket_0 + i * ket_1
+    expected = DiracNotation(expr).operate_reduce()
+    assert symboliq.qapply(expr, max_workers=2) == expected
+    assert symboliq.qapply(expr, backend="sparse", max_workers=2) == symboliq.qapply(
+        expr, backend="sparse"
+    )
+    assert DiracNotation(expr, max_workers=2).get_steps() == DiracNotation(expr).get_steps()
+
+
+def test_numeric_backend() -> None:
+    bell = cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0)
+    assert symboliq.qapply(bell, backend="numeric", nsimplify=True) == symboliq.qapply(bell)
+    assert (
+        str(symboliq.qapply(bell, backend="numeric"))
+        == "0.707106781186548*|0>x|0> + 0.707106781186548*|1>x|1>"
+    )
+    assert (
+        symboliq.qapply(
+            YGate(0) * Qubit("1") + Symbol("B_{0}") / 2 * ket_0, backend="numeric", max_workers=2
+        )
+        == (0.5 - 1.0 * sympy.I) * ket_0
+    )
+
+    with pytest.raises(ValueError, match="does not contain a state"):
+        symboliq.qapply(Symbol("a") + ket_0, backend="numeric")
+    with pytest.raises(ValueError, match="different numbers of qubits"):
+        symboliq.qapply(ket_0 + Qubit("01"), backend="numeric")
+
+
+def test_auto_backend() -> None:
+    alpha = Symbol("alpha", complex=True)
+    assert str(symboliq.qapply(h * ket_1, backend="auto")) == (
+        "0.707106781186548*|0> - 0.707106781186548*|1>"
+    )
+    assert symboliq.qapply(x * alpha * ket_0, backend="auto") == alpha * ket_1
+
+
+def test_stabilizer_backend() -> None:
+    alpha = Symbol("alpha")
+    bell = cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0)
+    assert symboliq.qapply(bell, backend="stabilizer") == symboliq.qapply(bell, backend="sparse")
+    assert isinstance(
+        DiracNotation(bell, backend="stabilizer").stabilizer_reduce(), StabilizerState
+    )
+    expr = alpha * YGate(1) * HadamardGate(0) * Qubit("10")
+    assert symboliq.qapply(expr, backend="stabilizer") == symboliq.qapply(expr, backend="sparse")
+    assert (
+        symboliq.qapply(h * ket_1, backend="stabilizer", coefficients="field")
+        == sqrt(2) / 2 * ket_0 - sqrt(2) / 2 * ket_1
+    )
+
+    # Anything else falls back to the sparse backend
+    assert DiracNotation(sympy.Integer(2), backend="stabilizer").stabilizer_reduce() is None
+    for expr in [
+        h * ket_0 + x * ket_1,
+        h * (ket_0 + ket_1),
+        B_0 * ket_0,
+        TGate(0) * Qubit("1"),
+        (0.7071067811865476 * (b_0 + b_1 + b_2 - b_3)).expand() * ket_0,
+    ]:
+        assert DiracNotation(expr, backend="stabilizer").stabilizer_reduce() is None
+        assert symboliq.qapply(expr, backend="stabilizer") == symboliq.qapply(
+            expr, backend="sparse"
+        )
+
+
+def test_lambdify() -> None:
+    alpha = Symbol("alpha", complex=True)
+    theta = Symbol("theta", real=True)
+    expr = (
+        cx
+        * TensorProduct(h, i)
+        * TensorProduct(sympy.cos(theta) * ket_0 + alpha * sympy.sin(theta) * ket_1, ket_0)
+    )
+    evaluate = DiracNotation(expr, backend="sparse").lambdify()
+    assert evaluate.symbols == (alpha, theta)
+    thetas = np.linspace(0, np.pi, 5)
+    amplitudes = evaluate(1j, thetas)
+    np.testing.assert_allclose(
+        amplitudes[:, 0], (np.cos(thetas) + 1j * np.sin(thetas)) / np.sqrt(2)
+    )
+    np.testing.assert_allclose(
+        amplitudes[:, 3], (np.cos(thetas) - 1j * np.sin(thetas)) / np.sqrt(2)
+    )
+    np.testing.assert_allclose(amplitudes[:, 1:3], 0)
+
+    evaluate = DiracNotation(x * (alpha * ket_0 + ket_1)).lambdify([alpha], cse=False)
+    np.testing.assert_allclose(evaluate(np.arange(3)), [[1, 0], [1, 1], [1, 2]])
+
+    # The symbolic backend compiles the amplitudes of the sparse one, which keeps every phase
+    evaluate = DiracNotation(h * (sympy.cos(theta) * ket_0 + sympy.sin(theta) * ket_1)).lambdify()
+    assert evaluate.symbols == (theta,)
+    np.testing.assert_allclose(evaluate(np.pi / 4), [1, 0], atol=1e-12)
+    np.testing.assert_allclose(DiracNotation(YGate(0) * Qubit("1")).lambdify()(), [-1j, 0])
+
+
+def test_measure() -> None:
+    bell = cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0)
+    for backend in ["symbolic", "sparse", "stabilizer"]:
+        measurement = DiracNotation(bell, backend=backend).measure()
+        assert measurement.probabilities() == {0: sympy.Rational(1, 2), 3: sympy.Rational(1, 2)}
+        assert set(measurement.counts(1000, seed=0)) == {0, 3}
+    assert DiracNotation(bell, backend="numeric").measure().numeric_probabilities(
+        [0]
+    ) == pytest.approx({0: 0.5, 1: 0.5})
+
+    theta = Symbol("theta", real=True)
+    measurement = DiracNotation(h * (sympy.cos(theta) * ket_0 + sympy.sin(theta) * ket_1)).measure()
+    probabilities = measurement.probabilities()
+    assert sympy.simplify(probabilities[0] - (1 + sympy.sin(2 * theta)) / 2) == 0
+    assert sympy.simplify(probabilities[1] - (1 - sympy.sin(2 * theta)) / 2) == 0
+
+
+def test_gate_reduce_cache() -> None:
+    gate_reduce_cache.clear()
+    expr = h * x * ket_1
+    result = sqrt(2) / 2 * ket_0 + sqrt(2) / 2 * ket_1
+    assert DiracNotation(expr).operate_reduce() == result
+    misses = gate_reduce_cache.info().misses
+    assert DiracNotation(expr).operate_reduce() == result
+    assert gate_reduce_cache.info().misses == misses
+    assert gate_reduce_cache.info().hits > 0
+
+    # Steps are still recorded when the cache already holds the result
+    assert get_simp_steps(x * ket_1) == DiracNotation(x * ket_1).get_steps()
+    assert len(DiracNotation(expr).get_steps().splitlines()) > 2
+
+    with gate_reduce_cache.disabled():
+        gate_reduce_cache.clear()
+        assert DiracNotation(expr).operate_reduce() == result
+    assert len(gate_reduce_cache) == 0
+
+
+def test_apply_factorwise() -> None:
+    # cx next to an identity used to be expanded across the whole tensor product
+    ghz = (
+        TensorProduct(i, cx)
+        * TensorProduct(cx, i)
+        * TensorProduct(h, i, i)
+        * TensorProduct(ket_0, ket_0, ket_0)
+    )
+    expected = sqrt(2) / 2 * TensorProduct(ket_0, ket_0, ket_0) + sqrt(2) / 2 * TensorProduct(
+        ket_1, ket_1, ket_1
+    )
+    dirac_notation = DiracNotation(ghz, record_steps=True)
+    assert dirac_notation.operate_reduce() == expected
+    assert list(dirac_notation.steps)[-1] == expected
+    assert symboliq.qapply(TensorProduct(x, i) ** 3 * TensorProduct(ket_0, ket_1)) == (
+        TensorProduct(ket_1, ket_1)
+    )
+
+    # States that aren't sums of computational basis states still go through the symbolic rules
+    psi = Ket("psi")
+    assert symboliq.qapply(TensorProduct(x, i) * TensorProduct(psi, ket_0)) == InnerProduct(
+        Bra(0), psi
+    ) * TensorProduct(ket_1, ket_0) + InnerProduct(Bra(1), psi) * TensorProduct(ket_0, ket_0)
+    assert symboliq.qapply(TensorProduct(x, i) ** 2 * TensorProduct(psi, ket_0)) == (
+        TensorProduct(psi, ket_0)
+    )
+    assert len(symboliq.qapply(TensorProduct(h, i) * TensorProduct(psi, ket_0)).args) == 4
+
+
+def test_record_steps() -> None:
+    dirac_notation = DiracNotation(x * ket_1)
+    assert dirac_notation.operate_reduce() == ket_0
+    assert not dirac_notation.steps
+
+    dirac_notation = DiracNotation(x * ket_1, record_steps=True)
+    assert dirac_notation.operate_reduce() == ket_0
+    assert list(dirac_notation.steps) == [b_1 * ket_1 + b_2 * ket_1, ket_0]
+    # Steps belong to the instance that recorded them
+    assert not DiracNotation(x * ket_1).steps
+
+    # Only the most recent steps are kept, under the numbers they have in the full list
+    assert DiracNotation(x * ket_1, max_steps=1).get_steps() == "(2) |0>\n"
+    assert DiracNotation(x * ket_1, max_steps=2).get_steps_latex().startswith("(1) ")
+    dirac_notation = DiracNotation(x * ket_1, max_steps=5)
+    assert (
+        dirac_notation.get_steps()
+        == dirac_notation.get_steps()
+        == DiracNotation(x * ket_1).get_steps()
+    )
+
+
+def test_iter_steps() -> None:
+    steps = DiracNotation(x * ket_1).iter_steps()
+    assert next(steps) == "(0) (|0><1| + |1><0|)*|1>\n"
+    assert list(steps) == ["(1) |0><1|*|1> + |1><0|*|1>\n", "(2) |0>\n"]
+
+    expected = DiracNotation(B_0 * ket_0).get_steps_latex()
+    latex_steps = DiracNotation(B_0 * ket_0).iter_steps(latex=True, max_workers=2)
+    assert "".join(latex_steps) == expected
+
+
+def test_write_steps() -> None:
+    expr = TensorProduct(h, i) * TensorProduct(ket_0, ket_0) + x * ket_1
+    stream = io.StringIO()
+    dirac_notation = DiracNotation(expr, max_workers=2)
+    dirac_notation.write_steps(stream)
+    assert stream.getvalue() == DiracNotation(expr).get_steps()
+    assert not dirac_notation.steps
+
+    stream = io.StringIO()
+    DiracNotation(B_0 * ket_0).write_steps(stream, latex=True)
+    assert stream.getvalue() == DiracNotation(B_0 * ket_0).get_steps_latex()
+
+
+def test_has_complex_symbols() -> None:
+    alpha = Symbol("alpha", complex=True)
+    assert _has_complex_symbols(alpha * ket_0 + Ket(alpha))
+    assert _has_complex_symbols(x * Ket(alpha))
+    assert not _has_complex_symbols(Symbol("a", real=True) * ket_0)
+    assert not _has_complex_symbols(x * ket_0)
+
+    dirac_notation = DiracNotation(x * (alpha * ket_0))
+    assert dirac_notation.operate_reduce() == dirac_notation.operate_reduce() == alpha * ket_1
+    assert dirac_notation.__dict__["_uses_complex_symbols"]
+
+
+def test_gate_powers() -> None:
+    n = Symbol("n", integer=True)
+    flipped = (1 + (-1) ** n) / 2 * ket_0 + (1 - (-1) ** n) / 2 * ket_1
+    assert DiracNotation(x**n * ket_0).operate_reduce() == flipped
+    assert DiracNotation(x ** (2 * n) * ket_0).operate_reduce() == ket_0
+    assert DiracNotation(x ** (2 * n + 1) * ket_0).operate_reduce() == ket_1
+    assert DiracNotation(x**1001 * ket_0).operate_reduce() == ket_1
+    assert DiracNotation(
+        TensorProduct(h, i) ** 3 * TensorProduct(ket_0, ket_0)
+    ).operate_reduce() == sqrt(2) / 2 * TensorProduct(ket_0, ket_0) + sqrt(2) / 2 * TensorProduct(
+        ket_1, ket_0
+    )
+
+    # Raised to the power by squaring rather than applied a million times
+    assert DiracNotation(sympy.Pow(b_0, 10**6) * ket_0).operate_reduce() == ket_0
+    assert DiracNotation(sympy.Pow(b_1, 10**6) * ket_1).operate_reduce() == 0
+    assert DiracNotation(sympy.Pow(b_1, 2) * ket_1).operate_reduce() == 0
+    phase = b_0 + sympy.I * b_3
+    assert DiracNotation(sympy.Pow(phase, 10**6 + 1) * ket_1).operate_reduce() == sympy.I * ket_1
+    t_power = DiracNotation(TGate(0) ** 9 * Qubit("1")).operate_reduce()
+    assert t_power == sympy.exp(sympy.I * sympy.pi / 4) * ket_1
+
+    psi = Ket("psi")
+    assert DiracNotation(sympy.Pow(b_0, 10**6) * psi).operate_reduce() == (
+        InnerProduct(bra_0, psi) * ket_0
+    )
+    assert DiracNotation(sympy.Pow(b_1, 5) * psi).operate_reduce() == 0
+    with pytest.raises(ValueError, match="not a computational basis state"):
+        DiracNotation(TGate(0) ** 9 * psi).operate_reduce()
+
+    with pytest.raises(ValueError, match="Cannot raise"):
+        DiracNotation(sympy.Pow(b_1, n) * ket_1).operate_reduce()
+
+
+def test_fuse() -> None:
+    first = XGate(0) * HadamardGate(1) * ZGate(0) * HadamardGate(1) * Qubit("00")
+    second = XGate(1) * CNotGate(1, 0) * XGate(0) * CNotGate(1, 0) * Qubit("01")
+    expr = first + second
+    expected = symboliq.qapply(expr, backend="sparse")
+    assert symboliq.qapply(expr, backend="sparse", fuse=True, max_workers=2) == expected
+    assert symboliq.qapply(expr, backend="numeric", fuse=True, nsimplify=True) == expected
+    assert symboliq.qapply(expr, backend="stabilizer", fuse=True) == expected
+    assert symboliq.qapply(expr, backend="auto", fuse=True, nsimplify=True) == expected
+    with pytest.raises(ValueError, match="needs the sparse or numeric backend"):
+        symboliq.qapply(expr, fuse=True)
+
+
+def test_coefficient_policies() -> None:
+    bell = cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0)
+    expected = sqrt(2) / 2 * TensorProduct(ket_0, ket_0) + sqrt(2) / 2 * TensorProduct(ket_1, ket_1)
+    for coefficients in ["eager", "collect", "deferred"]:
+        assert symboliq.qapply(bell, coefficients=coefficients) == expected
+        # The |1>x|1> terms of the two halves cancel
+        interference = bell + cx * TensorProduct(h, i) * TensorProduct(ket_1, ket_0)
+        assert symboliq.qapply(interference, coefficients=coefficients) == sqrt(2) * TensorProduct(
+            ket_0, ket_0
+        )
+    for coefficients in ["eager", "collect", "deferred", "field"]:
+        assert symboliq.qapply(bell, backend="sparse", coefficients=coefficients) == expected
+
+    # The -1.0 and 1.0 of the y operator are whole numbers, so they are exact in the field
+    assert symboliq.qapply(y * ket_0, backend="sparse", coefficients="field") == sympy.I * ket_1
+    assert (
+        symboliq.qapply(y * h * ket_0, backend="sparse", coefficients="field")
+        == sqrt(2) * sympy.I / 2 * ket_1 - sqrt(2) * sympy.I / 2 * ket_0
+    )
+
+    # H*Z*H|0> interferes down to a single term
+    circuit = HadamardGate(0) * ZGate(0) * HadamardGate(0) * Qubit("0")
+    assert symboliq.qapply(circuit, backend="sparse", coefficients="field", fuse=True) == ket_1
+
+    alpha, beta = sympy.symbols("alpha beta")
+    state = alpha * ket_0 + beta * ket_1
+    assert (
+        symboliq.qapply(h * state, backend="sparse", coefficients="deferred")
+        == sqrt(2) * (alpha + beta) / 2 * ket_0 + sqrt(2) * (alpha - beta) / 2 * ket_1
+    )
+    assert (
+        symboliq.qapply(HadamardGate(0) * h * Qubit("0"), backend="sparse", coefficients="deferred")
+        == ket_0
+    )
+    with pytest.raises(ValueError, match="is not in Q"):
+        symboliq.qapply(h * state, backend="sparse", coefficients="field")
+
+    # The symbolic backend keeps the symbols and merges the terms on the same ket, both after a
+    # gate and across the terms of the sum
+    assert (
+        symboliq.qapply(h * state, coefficients="collect")
+        == (sqrt(2) * alpha / 2 + sqrt(2) * beta / 2) * ket_0
+        + (sqrt(2) * alpha / 2 - sqrt(2) * beta / 2) * ket_1
+    )
+    assert symboliq.qapply(alpha * x * ket_0 + beta * ket_1, coefficients="collect") == (
+        (alpha + beta) * ket_1
+    )
+    assert (
+        symboliq.qapply(h * state, coefficients="deferred")
+        == sqrt(2) * (alpha + beta) / 2 * ket_0 + sqrt(2) * (alpha - beta) / 2 * ket_1
+    )
+    # The eager policy applies the same gates but leaves like terms apart
+    assert symboliq.qapply(h * state) == (
+        sqrt(2) * alpha / 2 * ket_0
+        + sqrt(2) * alpha / 2 * ket_1
+        + sqrt(2) * beta / 2 * ket_0
+        - sqrt(2) * beta / 2 * ket_1
+    )
+    assert symboliq.qapply(alpha * x * ket_0 + beta * ket_1) == alpha * ket_1 + beta * ket_1
+    assert len(symboliq.qapply(alpha * x * ket_0 + beta * ket_1).args) == 2
+    assert symboliq.qapply(alpha * x * ket_0) == alpha * ket_1
+    assert symboliq.qapply(x * alpha * h * ket_0) == (
+        sqrt(2) * alpha / 2 * ket_0 + sqrt(2) * alpha / 2 * ket_1
+    )
+
+    with pytest.raises(ValueError, match="Unknown coefficient policy 'lazy'"):
+        symboliq.qapply(bell, coefficients="lazy")
+    with pytest.raises(ValueError, match="needs the sparse backend"):
+        symboliq.qapply(bell, coefficients="field")
@@ -0,0 +1,162 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from typing import Any, Iterator, List, NamedTuple, Optional
+
+import sympy
+
+from symboliq._version import __version__
+from symboliq.cache import CacheInfo
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    result BLOB NOT NULL,
+    steps BLOB,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+class CachedReduction(NamedTuple):
+    result: sympy.Basic
+    steps: Optional[List[sympy.Expr]]
+
+
+def cache_key(expr: sympy.Basic, **options: Any) -> str:
+    """Returns the key a reduction is stored under
+    Args:
+        expr: The expression that was reduced
+        options: Anything else the result depends on, such as the backend
+    Returns:
+        A hash of the expression's srepr, the options and the symboliq and sympy versions
+    """
+    parts = [sympy.srepr(expr), repr(sorted(options.items())), __version__, sympy.__version__]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+class DiskCache:
+    """Reduced expressions, and optionally their steps, stored in an SQLite database so that
+    they survive the process and can be shared between processes.
+
+    Every process opens its own connection. Writers wait for each other for up to ``timeout``
+    seconds, and the database is in write-ahead-log mode so readers never wait for them. Once
+    the cache holds more than ``max_entries`` entries or ``max_bytes`` bytes of pickled
+    results, the least recently read or written entries are evicted. Values are pickled, so
+    only point this at a directory that is as trusted as the code itself.
+    """
+
+    FILENAME = "symboliq-cache.sqlite3"
+
+    def __init__(
+        self,
+        directory: str,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 2**20,
+        timeout: float = 30.0,
+    ):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("max_entries and max_bytes must be at least 1")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, self.FILENAME)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._timeout = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def __len__(self) -> int:
+        return int(self._execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be used by a forked child, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.path, timeout=self._timeout, isolation_level=None
+            )
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(_SCHEMA)
+        return self._connection
+
+    def _execute(self, sql: str, *parameters: Any) -> sqlite3.Cursor:
+        return self._connect().execute(sql, parameters)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connect()
+        # Taking the write lock up front stops two writers from both reading the sizes before
+        # either evicts anything
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get(self, key: str) -> Optional[CachedReduction]:
+        """Returns the reduction stored under a key, or None if there isn't one
+        Args:
+            key: A key from cache_key
+        Returns:
+            The result and the steps, which are None if they weren't stored
+        """
+        row = self._execute("SELECT result, steps FROM entries WHERE key = ?", key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._execute("UPDATE entries SET accessed = ? WHERE key = ?", time.time(), key)
+        result, steps = row
+        return CachedReduction(pickle.loads(result), None if steps is None else pickle.loads(steps))
+
+    def put(self, key: str, result: sympy.Basic, steps: Optional[List[sympy.Expr]] = None) -> None:
+        """Stores a reduction, replacing any stored under the same key, and evicts the least
+        recently used entries if the cache is then over its limits
+        Args:
+            key: A key from cache_key
+            result: The reduced expression
+            steps: The steps taken to reduce it, if they were recorded
+        """
+        result_blob = pickle.dumps(result)
+        steps_blob = None if steps is None else pickle.dumps(steps)
+        size = len(result_blob) + (0 if steps_blob is None else len(steps_blob))
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, result_blob, steps_blob, size, time.time()),
+            )
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        count, total = connection.execute("SELECT COUNT(*), SUM(size) FROM entries").fetchone()
+        rows = connection.execute("SELECT key, size FROM entries ORDER BY accessed, rowid")
+        evicted = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """Removes every entry and resets the hit and miss counters"""
+        self._execute("DELETE FROM entries")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.max_entries, len(self))
@@ -0,0 +1,120 @@
+import concurrent.futures
+import io
+import pathlib
+import pickle
+
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+
+from symboliq.cache import CacheInfo
+from symboliq.dirac_notation import DiracNotation, cx, h, i, ket_0, ket_1, qapply, x
+from symboliq.disk_cache import CachedReduction, DiskCache, cache_key
+
+bell = cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0)
+
+
+def test_cache_key() -> None:
+    assert cache_key(x * ket_0) == cache_key(x * ket_0)
+    assert cache_key(x * ket_0) != cache_key(x * ket_1)
+    assert cache_key(x * ket_0, backend="sparse") != cache_key(x * ket_0, backend="symbolic")
+    assert cache_key(x * ket_0, a=1, b=2) == cache_key(x * ket_0, b=2, a=1)
+
+
+def test_get_and_put(tmp_path: pathlib.Path) -> None:
+    cache = DiskCache(str(tmp_path / "cache"))
+    key = cache_key(bell)
+    assert cache.get(key) is None
+    cache.put(key, ket_0, [bell, ket_0])
+    assert cache.get(key) == CachedReduction(ket_0, [bell, ket_0])
+    cache.put(key, ket_1)
+    assert cache.get(key) == CachedReduction(ket_1, None)
+    assert cache.info() == CacheInfo(hits=2, misses=1, maxsize=10000, currsize=1)
+
+    # Another instance, as in a new process, sees the same entries
+    cache.close()
+    cache.close()
+    reopened = DiskCache(str(tmp_path / "cache"))
+    assert reopened.get(key) == CachedReduction(ket_1, None)
+    reopened.clear()
+    assert reopened.info() == CacheInfo(hits=0, misses=0, maxsize=10000, currsize=0)
+
+    with pytest.raises(ValueError, match="at least 1"):
+        DiskCache(str(tmp_path), max_bytes=0)
+
+
+def test_eviction(tmp_path: pathlib.Path) -> None:
+    cache = DiskCache(str(tmp_path), max_entries=2)
+    cache.put("a", ket_0)
+    cache.put("b", ket_0)
+    cache.get("a")
+    cache.put("c", ket_0)
+    # "b" was the least recently used entry, so it is the one that got evicted
+    assert len(cache) == 2 and cache.get("b") is None and cache.get("a") is not None
+
+    size = len(pickle.dumps(ket_0))
+    cache = DiskCache(str(tmp_path / "bytes"), max_bytes=3 * size)
+    for key in "abcd":
+        cache.put(key, ket_0)
+    assert [cache.get(key) is None for key in "abcd"] == [True, False, False, False]
+    # The steps make this entry more than twice as big, so it pushes out the other three
+    cache.put("e", ket_0, [ket_0])
+    assert len(cache) == 1 and cache.get("e") is not None
+
+
+def test_transaction_rollback(tmp_path: pathlib.Path) -> None:
+    cache = DiskCache(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with cache._transaction() as connection:
+            connection.execute("DELETE FROM entries")
+            raise RuntimeError
+    cache.put("a", ket_0)
+    assert len(cache) == 1
+
+
+def _put(task: tuple) -> None:  # type: ignore[type-arg]
+    directory, start = task
+    cache = DiskCache(directory, max_entries=50)
+    for key in range(start, start + 20):
+        cache.put(str(key), ket_0)
+
+
+def test_concurrent_writers(tmp_path: pathlib.Path) -> None:
+    cache = DiskCache(str(tmp_path), max_entries=50)
+    cache.put("first", ket_1)
+    _put((str(tmp_path), 80))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_put, [(str(tmp_path), 20 * k) for k in range(4)]))
+    # Every writer evicted down to the limit, and the connection opened before the workers
+    # were forked still works
+    assert len(cache) == 50
+    cache.put("last", ket_1)
+    assert cache.get("last") == CachedReduction(ket_1, None)
+
+
+def test_qapply(tmp_path: pathlib.Path) -> None:
+    cache = DiskCache(str(tmp_path))
+    expected = qapply(bell)
+    assert qapply(bell, disk_cache=cache) == expected
+    assert qapply(bell, disk_cache=cache) == expected
+    assert qapply(bell, backend="sparse", disk_cache=cache) == expected
+    assert cache.info() == CacheInfo(hits=1, misses=2, maxsize=10000, currsize=2)
+
+    # A stored result is replaced by one with steps once they are asked for
+    steps = DiracNotation(bell).get_steps()
+    assert DiracNotation(bell, disk_cache=cache).get_steps() == steps
+    key = cache_key(bell, backend="symbolic", nsimplify=False, fuse=False, coefficients="eager")
+    cached = cache.get(key)
+    assert cached is not None and cached.result == expected and cached.steps is not None
+    stream, cached_stream = io.StringIO(), io.StringIO()
+    DiracNotation(bell).write_steps(stream)
+    DiracNotation(bell, disk_cache=DiskCache(str(tmp_path / "steps"))).write_steps(cached_stream)
+    assert cached_stream.getvalue() == stream.getvalue()
+
+    # Results are served from the cache whenever the key matches
+    cache.clear()
+    cache.put(key, sympy.Integer(7))
+    assert qapply(bell, disk_cache=cache) == 7
+    assert DiracNotation(bell, disk_cache=cache).get_steps() == steps
+    assert DiracNotation(bell, disk_cache=cache).get_steps() == steps
+    assert cache.info() == CacheInfo(hits=3, misses=0, maxsize=10000, currsize=1)
@@ -0,0 +1,71 @@
+from typing import Optional, Sequence, Set
+
+import numpy as np
+import numpy.typing as npt
+import sympy
+
+from symboliq.numeric import Vector
+from symboliq.sparse_state import SparseState
+
+
+class AmplitudeEvaluator:
+    """The amplitudes of a state with free symbols compiled to a single NumPy function, so that
+    they can be evaluated at many parameter values at once instead of one subs and evalf each.
+
+        >> evaluate = AmplitudeEvaluator(SparseState.from_expr(alpha * ket_0 + beta * ket_1))
+        >> evaluate(np.array([1.0, 2.0]), 0.5)
+        array([[1. +0.j, 0.5+0.j],
+               [2. +0.j, 0.5+0.j]])
+    """
+
+    def __init__(
+        self,
+        state: SparseState,
+        symbols: Optional[Sequence[sympy.Symbol]] = None,
+        cse: bool = True,
+    ):
+        """Compiles the amplitudes of a state
+        Args:
+            state: The state, whose amplitudes may contain free symbols
+            symbols: The arguments of the evaluator, in order. By default, the free symbols of
+                the amplitudes sorted by name
+            cse: Whether subexpressions shared between the amplitudes are computed only once
+        """
+        free_symbols: Set[sympy.Symbol] = set()
+        for amplitude in state.amplitudes.values():
+            free_symbols.update(amplitude.atoms(sympy.Symbol))
+        if symbols is None:
+            symbols = sorted(free_symbols, key=str)
+        missing = free_symbols - set(symbols)
+        if missing:
+            raise ValueError(f"The amplitudes also depend on {sorted(missing, key=str)}")
+        self.symbols = tuple(symbols)
+        self.num_qubits = state.num_qubits
+        self.basis_indices = sorted(state.amplitudes)
+        self._function = sympy.lambdify(
+            self.symbols,
+            [state.amplitudes[index] for index in self.basis_indices],
+            modules="numpy",
+            cse=cse,
+        )
+
+    def __repr__(self) -> str:
+        return f"AmplitudeEvaluator({self.num_qubits}, symbols={self.symbols})"
+
+    def __call__(self, *values: npt.ArrayLike) -> Vector:
+        """Evaluates the amplitudes
+        Args:
+            values: A number or an array of numbers for each symbol, in the order of
+                self.symbols. The arrays are broadcast against each other
+        Returns:
+            An array of the broadcast shape of the values with one more axis, of length
+            2^num_qubits, holding the amplitude of each computational basis state
+        """
+        if len(values) != len(self.symbols):
+            raise ValueError(f"Expected values for {len(self.symbols)} symbols, got {len(values)}")
+        arrays = [np.asarray(value) for value in values]
+        shape = np.broadcast_shapes(*[array.shape for array in arrays])
+        amplitudes = np.zeros(shape + (2**self.num_qubits,), dtype=np.complex128)
+        for index, amplitude in zip(self.basis_indices, self._function(*arrays)):
+            amplitudes[..., index] = amplitude
+        return amplitudes
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import sympy
+from sympy import Symbol
+from sympy.physics.quantum import TensorProduct
+
+from symboliq.dirac_notation import ket_0, ket_1
+from symboliq.evaluator import AmplitudeEvaluator
+from symboliq.sparse_state import SparseState
+
+
+def test_evaluate() -> None:
+    alpha, beta = Symbol("alpha", complex=True), Symbol("beta", real=True)
+    state = SparseState.from_expr(
+        sympy.cos(beta) * alpha * TensorProduct(ket_0, ket_1)
+        + sympy.I * sympy.sin(beta) * sympy.conjugate(alpha) * TensorProduct(ket_1, ket_1)
+        + TensorProduct(ket_1, ket_0) / 2
+    )
+    evaluate = AmplitudeEvaluator(state)
+    assert evaluate.symbols == (alpha, beta)
+    assert evaluate.basis_indices == [1, 2, 3]
+    assert repr(evaluate) == "AmplitudeEvaluator(2, symbols=(alpha, beta))"
+
+    alphas = np.array([1.0, 1j, 2 - 1j])
+    betas = np.linspace(0, np.pi, 4).reshape(4, 1)
+    amplitudes = evaluate(alphas, betas)
+    assert amplitudes.shape == (4, 3, 4)
+    np.testing.assert_allclose(amplitudes[..., 0], 0)
+    np.testing.assert_allclose(amplitudes[..., 1], np.cos(betas) * alphas)
+    np.testing.assert_allclose(amplitudes[..., 2], 0.5)
+    np.testing.assert_allclose(amplitudes[..., 3], 1j * np.sin(betas) * np.conj(alphas))
+
+    for index, amplitude in state.amplitudes.items():
+        expected = complex(amplitude.subs({alpha: 2 - 1j, beta: np.pi / 3}))
+        assert evaluate(2 - 1j, np.pi / 3)[index] == pytest.approx(expected)
+        assert AmplitudeEvaluator(state, cse=False)(2 - 1j, np.pi / 3)[index] == pytest.approx(
+            expected
+        )
+
+
+def test_symbols() -> None:
+    alpha, beta = Symbol("alpha"), Symbol("beta")
+    state = SparseState.from_expr(alpha * ket_0 + 2 * alpha * ket_1)
+    evaluate = AmplitudeEvaluator(state, [beta, alpha])
+    np.testing.assert_allclose(evaluate(np.zeros(2), [1, 3]), [[1, 2], [3, 6]])
+
+    constant = AmplitudeEvaluator(SparseState.from_expr(ket_1))
+    assert constant.symbols == ()
+    np.testing.assert_allclose(constant(), [0, 1])
+
+    with pytest.raises(ValueError, match=r"also depend on \[alpha\]"):
+        AmplitudeEvaluator(state, [beta])
+    with pytest.raises(ValueError, match="values for 2 symbols, got 1"):
+        evaluate(1.0)
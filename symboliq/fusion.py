@@ -0,0 +1,48 @@
+from typing import List, Optional, Sequence, Tuple
+
+from symboliq.operators import LoweredFactor, SparseOperator
+
+
+def fuse(factors: Sequence[LoweredFactor]) -> LoweredFactor:
+    """Combines the operators of a product before any state is touched.
+
+    Every operator is moved back past the earlier operators on other qubits, which it commutes
+    with, until it meets one that shares a qubit with it. If that one acts on exactly the same
+    qubits the two are multiplied into a single operator, which is dropped altogether when it is
+    the identity, so pairs such as X*X, H*H and CX*CX cancel.
+        Args:
+            factors: The lowered factors in the order they are applied, i.e. rightmost first
+        Returns:
+            A single factor applying the same operator as all of them
+    """
+    num_qubits: Optional[int] = None
+    steps: List[Tuple[SparseOperator, Tuple[int, ...]]] = []
+    for factor in factors:
+        if factor.num_qubits is not None:
+            if num_qubits is not None and num_qubits != factor.num_qubits:
+                raise ValueError(
+                    f"Operators act on {num_qubits} and {factor.num_qubits} qubits respectively"
+                )
+            num_qubits = factor.num_qubits
+        for operator, targets in factor.steps:
+            _push(steps, operator, targets)
+    return LoweredFactor(num_qubits, steps)
+
+
+def _push(
+    steps: List[Tuple[SparseOperator, Tuple[int, ...]]],
+    operator: SparseOperator,
+    targets: Tuple[int, ...],
+) -> None:
+    for position in range(len(steps) - 1, -1, -1):
+        previous, previous_targets = steps[position]
+        if previous_targets == targets:
+            product = operator.compose(previous)
+            if product.is_identity():
+                del steps[position]
+            else:
+                steps[position] = (product, targets)
+            return
+        if set(previous_targets) & set(targets):
+            break
+    steps.append((operator, targets))
@@ -0,0 +1,46 @@
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+from sympy.physics.quantum.gate import CNotGate, HadamardGate, XGate, ZGate
+
+from symboliq.dirac_notation import i, x
+from symboliq.fusion import fuse
+from symboliq.operators import GATE_TABLE, LoweredFactor, from_matrix, lower_factor
+
+sparse_x = GATE_TABLE[XGate]
+sparse_cx = GATE_TABLE[CNotGate]
+
+
+def test_cancel_inverse_pairs() -> None:
+    for gate in [XGate(0), HadamardGate(2), CNotGate(1, 0)]:
+        assert fuse([lower_factor(gate), lower_factor(gate)]) == LoweredFactor(None, [])
+    assert fuse([lower_factor(x), lower_factor(x)]) == LoweredFactor(1, [])
+
+
+def test_commute_disjoint_gates() -> None:
+    factors = [lower_factor(gate) for gate in [HadamardGate(0), XGate(1), HadamardGate(0)]]
+    assert fuse(factors) == LoweredFactor(None, [(sparse_x, (1,))])
+
+    # The CNOT shares qubit 0 with both X gates, so nothing moves past it
+    factors = [lower_factor(gate) for gate in [XGate(0), CNotGate(1, 0), XGate(0)]]
+    assert fuse(factors) == LoweredFactor(
+        None, [(sparse_x, (0,)), (sparse_cx, (1, 0)), (sparse_x, (0,))]
+    )
+    factors = [lower_factor(CNotGate(1, 0)), lower_factor(CNotGate(0, 1))]
+    assert fuse(factors).steps == [(sparse_cx, (1, 0)), (sparse_cx, (0, 1))]
+
+
+def test_fuse_single_qubit_gates() -> None:
+    factors = [lower_factor(gate) for gate in [XGate(0), XGate(1), ZGate(0)]]
+    # Z*X = [[0, 1], [-1, 0]] on qubit 0
+    assert fuse(factors) == LoweredFactor(
+        None,
+        [(from_matrix(sympy.Matrix([[0, 1], [-1, 0]])), (0,)), (sparse_x, (1,))],
+    )
+
+
+def test_register_sizes() -> None:
+    factors = [lower_factor(TensorProduct(x, i)), lower_factor(XGate(1))]
+    assert fuse(factors) == LoweredFactor(2, [])
+    with pytest.raises(ValueError, match="act on 2 and 1 qubits"):
+        fuse([lower_factor(TensorProduct(x, i)), lower_factor(x)])
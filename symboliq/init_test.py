@@ -0,0 +1,20 @@
+import subprocess
+import sys
+
+import pytest
+
+import symboliq
+
+
+def test_lazy_imports() -> None:
+    code = "import sys, symboliq; print(symboliq.__version__, 'sympy' in sys.modules)"
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert process.stdout.split() == [symboliq.__version__, "False"]
+
+    assert symboliq.fusion.fuse([]).steps == []
+    assert symboliq.qapply is symboliq.dirac_notation.qapply
+    assert {"benchmarks", "qapply", "__version__"} <= set(dir(symboliq))
+    with pytest.raises(AttributeError, match="has no attribute 'missing'"):
+        _ = symboliq.missing
@@ -0,0 +1,127 @@
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+import sympy
+
+from symboliq.sparse_state import SparseState
+
+Seed = Optional[Union[int, np.random.Generator]]
+
+
+class Measurement:
+    """The outcomes of measuring a state in the computational basis.
+
+    The probabilities are read off the amplitudes of the state one term at a time, rather than
+    by reducing the inner product of the state with itself, which multiplies every term by
+    every other one. Outcomes are basis indices, read like those of a SparseState, or for a
+    subset of the qubits the bits of those qubits with the first one listed most significant.
+
+        >> measurement = Measurement(SparseState.from_expr(qapply(bell)))
+        >> measurement.probabilities()
+        {0: 1/2, 3: 1/2}
+        >> measurement.counts(1000, seed=1)
+        {0: 493, 3: 507}
+    """
+
+    def __init__(self, state: SparseState):
+        self.num_qubits = state.num_qubits
+        self.state = state
+        # Indices of registers of 63 qubits or more do not fit into int64
+        dtype = np.int64 if state.num_qubits < 63 else object
+        self.basis_indices = np.array(sorted(state.amplitudes), dtype=dtype)
+
+    def __repr__(self) -> str:
+        return f"Measurement({self.state!r})"
+
+    def probabilities(self, qubits: Optional[Sequence[int]] = None) -> Dict[int, sympy.Expr]:
+        """Returns the exact probability of every outcome that can occur
+        Args:
+            qubits: The qubits to measure, most significant first, or None for all of them
+        Returns:
+            A map from outcome to probability, the squared magnitude of the amplitude summed
+            over the basis states that give the outcome
+        """
+        probabilities: Dict[int, sympy.Expr] = {}
+        outcomes = self._outcomes(qubits)
+        for outcome, index in zip(outcomes.tolist(), self.basis_indices.tolist()):
+            amplitude = self.state.amplitudes[index]
+            probability = sympy.expand(amplitude * sympy.conjugate(amplitude))
+            probabilities[outcome] = probabilities.get(outcome, sympy.Integer(0)) + probability
+        return probabilities
+
+    def numeric_probabilities(self, qubits: Optional[Sequence[int]] = None) -> Dict[int, float]:
+        """Returns the probability of every outcome that can occur as a float
+        Args:
+            qubits: The qubits to measure, most significant first, or None for all of them
+        Returns:
+            A map from outcome to probability
+        """
+        outcomes, inverse = np.unique(self._outcomes(qubits), return_inverse=True)
+        totals = np.bincount(inverse.reshape(-1), weights=self._weights(), minlength=len(outcomes))
+        return dict(zip(outcomes.tolist(), totals.tolist()))
+
+    def sample(
+        self, shots: int, qubits: Optional[Sequence[int]] = None, seed: Seed = None
+    ) -> npt.NDArray[np.int64]:
+        """Draws outcomes at random, all at once
+        Args:
+            shots: How many outcomes to draw
+            qubits: The qubits to measure, most significant first, or None for all of them
+            seed: A seed or a NumPy random generator
+        Returns:
+            The outcomes in the order they were drawn
+        """
+        rng = np.random.default_rng(seed)
+        drawn = rng.choice(len(self.basis_indices), size=shots, p=self._distribution())
+        return self._outcomes(qubits)[drawn]
+
+    def counts(
+        self, shots: int, qubits: Optional[Sequence[int]] = None, seed: Seed = None
+    ) -> Dict[int, int]:
+        """Counts how often each outcome occurs in a number of shots. The counts are drawn from a
+        multinomial distribution, so this takes the same time for a million shots as for one
+        Args:
+            shots: How many outcomes to draw
+            qubits: The qubits to measure, most significant first, or None for all of them
+            seed: A seed or a NumPy random generator
+        Returns:
+            A map from each outcome that occurred to the number of times it did
+        """
+        rng = np.random.default_rng(seed)
+        per_basis_state = rng.multinomial(shots, self._distribution())
+        counts: Dict[int, int] = {}
+        for outcome, count in zip(self._outcomes(qubits).tolist(), per_basis_state.tolist()):
+            if count:
+                counts[outcome] = counts.get(outcome, 0) + count
+        return counts
+
+    def _weights(self) -> npt.NDArray[np.float64]:
+        # The squared magnitudes of the amplitudes in the order of self.basis_indices
+        amplitudes = []
+        for index in self.basis_indices.tolist():
+            amplitude = self.state.amplitudes[index]
+            if amplitude.free_symbols:
+                raise ValueError(f"The amplitude {amplitude} has free symbols")
+            amplitudes.append(complex(amplitude))
+        return np.abs(np.array(amplitudes, dtype=np.complex128)) ** 2
+
+    def _distribution(self) -> npt.NDArray[np.float64]:
+        # Normalized, so that rounding errors and states that are not unit vectors still sample
+        weights = self._weights()
+        total = weights.sum()
+        if total == 0:
+            raise ValueError("Cannot measure the zero state")
+        return weights / total
+
+    def _outcomes(self, qubits: Optional[Sequence[int]]) -> npt.NDArray[np.int64]:
+        if qubits is None:
+            return self.basis_indices
+        if len(set(qubits)) != len(qubits) or not all(
+            0 <= qubit < self.num_qubits for qubit in qubits
+        ):
+            raise ValueError(f"Invalid qubits {tuple(qubits)} for a {self.num_qubits} qubit state")
+        outcomes = np.zeros_like(self.basis_indices)
+        for qubit in qubits:
+            outcomes = (outcomes << 1) | ((self.basis_indices >> qubit) & 1)
+        return outcomes
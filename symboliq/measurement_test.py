@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+import sympy
+from sympy import Symbol
+from sympy.physics.quantum import TensorProduct
+
+from symboliq.dirac_notation import ket_0, ket_1
+from symboliq.measurement import Measurement
+from symboliq.sparse_state import SparseState
+
+half = sympy.Rational(1, 2)
+
+
+def test_probabilities() -> None:
+    state = SparseState.from_expr(
+        half * TensorProduct(ket_0, ket_1)
+        + (1 + sympy.I) / 2 * TensorProduct(ket_1, ket_0)
+        - half * TensorProduct(ket_1, ket_1)
+    )
+    measurement = Measurement(state)
+    assert repr(measurement) == f"Measurement({state!r})"
+    assert measurement.basis_indices.tolist() == [1, 2, 3]
+    assert measurement.probabilities() == {
+        1: sympy.Rational(1, 4),
+        2: half,
+        3: sympy.Rational(1, 4),
+    }
+    assert measurement.probabilities([1]) == {0: sympy.Rational(1, 4), 1: sympy.Rational(3, 4)}
+    assert measurement.probabilities([0, 1]) == {
+        2: sympy.Rational(1, 4),
+        1: half,
+        3: sympy.Rational(1, 4),
+    }
+    assert measurement.numeric_probabilities() == pytest.approx({1: 0.25, 2: 0.5, 3: 0.25})
+    assert measurement.numeric_probabilities([0]) == pytest.approx({0: 0.5, 1: 0.5})
+
+    alpha = Symbol("alpha", complex=True)
+    symbolic = Measurement(SparseState.from_expr(alpha * ket_0 + half * ket_1))
+    assert symbolic.probabilities() == {0: alpha * sympy.conjugate(alpha), 1: sympy.Rational(1, 4)}
+    with pytest.raises(ValueError, match="has free symbols"):
+        symbolic.numeric_probabilities()
+
+
+def test_sample_and_counts() -> None:
+    measurement = Measurement(SparseState.from_expr(half * ket_0 + sympy.sqrt(3) / 2 * ket_1))
+    shots = measurement.sample(100000, seed=1)
+    assert shots.shape == (100000,)
+    assert np.mean(shots) == pytest.approx(0.75, abs=0.01)
+    assert np.array_equal(shots, measurement.sample(100000, seed=np.random.default_rng(1)))
+
+    counts = measurement.counts(10**7, seed=2)
+    assert sum(counts.values()) == 10**7
+    assert counts[1] / 10**7 == pytest.approx(0.75, abs=0.001)
+    assert Measurement(SparseState.from_expr(ket_1)).counts(10) == {1: 10}
+
+    # States that are not unit vectors are normalized first
+    unnormalized = Measurement(SparseState.from_expr(2 * ket_0 + 2 * ket_1))
+    assert set(unnormalized.counts(1000, seed=3)) == {0, 1}
+
+
+def test_marginal_shots() -> None:
+    measurement = Measurement(
+        SparseState.from_expr(
+            half * TensorProduct(ket_0, ket_0, ket_1)
+            + half * TensorProduct(ket_0, ket_1, ket_1)
+            + sympy.sqrt(2) / 2 * TensorProduct(ket_1, ket_1, ket_0)
+        )
+    )
+    assert set(measurement.sample(1000, qubits=[0, 2], seed=4).tolist()) == {2, 1}
+    counts = measurement.counts(10000, qubits=[1], seed=5)
+    assert set(counts) == {0, 1} and sum(counts.values()) == 10000
+    assert counts[1] / 10000 == pytest.approx(0.75, abs=0.02)
+
+
+def test_many_qubits() -> None:
+    ghz = TensorProduct(*[ket_0] * 70) + TensorProduct(*[ket_1] * 70)
+    measurement = Measurement(SparseState.from_expr(ghz))
+    assert measurement.basis_indices.dtype == object
+    assert set(measurement.sample(100, qubits=[69, 0], seed=0).tolist()) == {0, 3}
+    assert set(measurement.counts(100, seed=0)) == {0, 2**70 - 1}
+
+
+def test_invalid_arguments() -> None:
+    measurement = Measurement(SparseState.from_expr(TensorProduct(ket_0, ket_1)))
+    for qubits in [[2], [0, 0], [-1]]:
+        with pytest.raises(ValueError, match="Invalid qubits"):
+            measurement.probabilities(qubits)
+    with pytest.raises(ValueError, match="zero state"):
+        Measurement(SparseState(1)).sample(1)
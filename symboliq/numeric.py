@@ -0,0 +1,89 @@
+import numpy as np
+import numpy.typing as npt
+import sympy
+
+from symboliq.operators import (
+    LoweredFactor,
+    SparseOperator,
+    Targets,
+    check_register,
+    resolve_targets,
+)
+from symboliq.sparse_state import SparseState
+
+Vector = npt.NDArray[np.complex128]
+
+
+def to_matrix(operator: SparseOperator) -> Vector:
+    """Converts an operator without free symbols to a dense NumPy matrix"""
+    matrix = np.zeros((2**operator.num_qubits,) * 2, dtype=np.complex128)
+    for j, column in operator.columns.items():
+        for i, entry in column.items():
+            matrix[i, j] = complex(entry)
+    return matrix
+
+
+def to_vector(state: SparseState) -> Vector:
+    """Converts a state without free symbols to a dense NumPy state vector"""
+    vector = np.zeros(2**state.num_qubits, dtype=np.complex128)
+    for index, amplitude in state.amplitudes.items():
+        vector[index] = complex(amplitude)
+    return vector
+
+
+def apply_matrix(
+    vector: Vector, num_qubits: int, operator: SparseOperator, targets: Targets = None
+) -> Vector:
+    """Applies an operator to a state vector by contracting it with the axes of the qubits it
+    targets only, instead of building its Kronecker product with identities on the other qubits
+        Args:
+            vector: The state vector, of length 2^num_qubits
+            num_qubits: The number of qubits of the state
+            operator: The operator to apply
+            targets: The qubits it acts on, most significant first, or None for the whole register
+        Returns:
+            The new state vector
+    """
+    targets = resolve_targets(operator, targets, num_qubits)
+    num_targets = len(targets)
+    # Axis 0 of the reshaped vector is the most significant qubit
+    axes = [num_qubits - 1 - target for target in targets]
+    tensor = np.tensordot(
+        to_matrix(operator).reshape((2,) * (2 * num_targets)),
+        vector.reshape((2,) * num_qubits),
+        axes=(list(range(num_targets, 2 * num_targets)), axes),
+    )
+    return np.moveaxis(tensor, list(range(num_targets)), axes).reshape(-1)
+
+
+def apply_factor(vector: Vector, num_qubits: int, factor: LoweredFactor) -> Vector:
+    """Applies every operator of a lowered factor to the qubits it targets"""
+    check_register(factor, num_qubits)
+    for operator, targets in factor.steps:
+        vector = apply_matrix(vector, num_qubits, operator, targets)
+    return vector
+
+
+def from_vector(
+    vector: Vector, num_qubits: int, nsimplify: bool = False, atol: float = 1e-12
+) -> SparseState:
+    """Converts a state vector back to a SparseState
+    Args:
+        vector: The state vector
+        num_qubits: The number of qubits of the state
+        nsimplify: Whether to recover exact amplitudes such as sqrt(2)/2 from the floats
+        atol: Amplitudes (and their real or imaginary parts) smaller than this are dropped
+    Returns:
+        The nonzero amplitudes of the vector
+    """
+    amplitudes = {}
+    for index in np.flatnonzero(np.abs(vector) > atol):
+        amplitudes[int(index)] = _to_sympy(complex(vector[index]), nsimplify, atol)
+    return SparseState(num_qubits, amplitudes)
+
+
+def _to_sympy(value: complex, nsimplify: bool, atol: float) -> sympy.Expr:
+    real, imag = (part if abs(part) > atol else 0.0 for part in (value.real, value.imag))
+    if nsimplify:
+        return sympy.nsimplify(complex(real, imag), [sympy.sqrt(2)], tolerance=atol)
+    return sympy.Float(real) + sympy.I * sympy.Float(imag) if imag else sympy.Float(real)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+
+from symboliq import numeric
+from symboliq.dirac_notation import cx, h, i, x
+from symboliq.operators import lower_factor, lower_operator
+from symboliq.sparse_state import SparseState
+
+
+def test_to_matrix() -> None:
+    np.testing.assert_array_equal(numeric.to_matrix(lower_operator(x)[0]), [[0, 1], [1, 0]])
+
+
+def test_to_vector() -> None:
+    state = SparseState(2, {0b01: sympy.sqrt(2) / 2, 0b10: -sympy.I})
+    np.testing.assert_allclose(numeric.to_vector(state), [0, np.sqrt(0.5), -1j, 0])
+
+
+def test_apply_matrix() -> None:
+    vector = numeric.to_vector(SparseState(3, {0b100: sympy.Integer(1)}))
+    # X on qubit 0, i.e. the least significant bit
+    result = numeric.apply_matrix(vector, 3, lower_operator(x)[0], (0,))
+    np.testing.assert_array_equal(
+        result, numeric.to_vector(SparseState(3, {0b101: sympy.Integer(1)}))
+    )
+    # CNOT with qubit 2 as control and qubit 1 as target
+    result = numeric.apply_matrix(result, 3, lower_operator(cx)[0], (2, 1))
+    np.testing.assert_array_equal(
+        result, numeric.to_vector(SparseState(3, {0b111: sympy.Integer(1)}))
+    )
+
+    vector = numeric.to_vector(SparseState(1, {0: sympy.Integer(1)}))
+    np.testing.assert_allclose(
+        numeric.apply_matrix(vector, 1, lower_operator(h)[0]), [np.sqrt(0.5), np.sqrt(0.5)]
+    )
+    with pytest.raises(ValueError, match="cannot act on 1 qubits"):
+        numeric.apply_matrix(vector, 1, lower_operator(cx)[0])
+
+
+def test_apply_factor() -> None:
+    vector = numeric.to_vector(SparseState(3, {0b000: sympy.Integer(1)}))
+    result = numeric.apply_factor(vector, 3, lower_factor(TensorProduct(x, i, h)))
+    np.testing.assert_allclose(result, [0, 0, 0, 0, np.sqrt(0.5), np.sqrt(0.5), 0, 0])
+    with pytest.raises(ValueError, match="A 3 qubit operator cannot act on 2 qubits"):
+        numeric.apply_factor(vector, 2, lower_factor(TensorProduct(x, i, h)))
+
+
+def test_from_vector() -> None:
+    vector = np.array([np.sqrt(0.5), 1e-17 - 0.5j, 0, 0.25 + 1e-17j])
+    assert numeric.from_vector(vector, 2) == SparseState(
+        2, {0: sympy.Float(float(np.sqrt(0.5))), 1: -0.5 * sympy.I, 3: sympy.Float(0.25)}
+    )
+    assert numeric.from_vector(vector, 2, nsimplify=True) == SparseState(
+        2, {0: sympy.sqrt(2) / 2, 1: -sympy.I / 2, 3: sympy.Rational(1, 4)}
+    )
@@ -0,0 +1,381 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type, Union
+
+import sympy
+from sympy.physics.quantum import Bra, Ket, OuterProduct, TensorProduct
+from sympy.physics.quantum.gate import (
+    CGate,
+    CNotGate,
+    Gate,
+    HadamardGate,
+    IdentityGate,
+    XGate,
+    YGate,
+    ZGate,
+)
+
+Columns = Dict[int, Dict[int, sympy.Expr]]
+Targets = Optional[Tuple[int, ...]]
+
+# The symbols B_0 ... B_3 stand for the outer products |a><b| given here as (a, b)
+_BASE_SYMBOLS = {"B_{0}": (0, 0), "B_{1}": (0, 1), "B_{2}": (1, 0), "B_{3}": (1, 1)}
+
+
+class SparseOperator:
+    """An operator stored by its nonzero matrix elements in the computational basis.
+
+    ``columns[j][i]`` is the matrix element ``<i|op|j>``. Basis indices are read like a ``Qubit``
+    label, so the leftmost tensor factor is the most significant bit.
+    """
+
+    def __init__(self, num_qubits: int, columns: Columns):
+        self.num_qubits = num_qubits
+        self.columns = columns
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SparseOperator):
+            return NotImplemented
+        return self.num_qubits == other.num_qubits and self.columns == other.columns
+
+    def __repr__(self) -> str:
+        return f"SparseOperator({self.num_qubits}, {self.columns})"
+
+    def is_identity(self) -> bool:
+        return len(self.columns) == 2 ** self.num_qubits and all(
+            column == {j: 1} for j, column in self.columns.items()
+        )
+
+    @classmethod
+    def identity(cls, num_qubits: int) -> "SparseOperator":
+        return cls(num_qubits, {j: {j: sympy.Integer(1)} for j in range(2**num_qubits)})
+
+    def add(self, other: "SparseOperator") -> "SparseOperator":
+        """Returns the sum of this operator and another one of the same size"""
+        _check_same_size(self, other)
+        columns = {j: dict(column) for j, column in self.columns.items()}
+        for j, column in other.columns.items():
+            new_column = columns.setdefault(j, {})
+            for i, entry in column.items():
+                new_column[i] = new_column[i] + entry if i in new_column else entry
+        return SparseOperator(self.num_qubits, _prune(columns))
+
+    def scale(self, coefficient: sympy.Expr) -> "SparseOperator":
+        """Returns this operator multiplied by a scalar"""
+        columns = {
+            j: {i: coefficient * entry for i, entry in column.items()}
+            for j, column in self.columns.items()
+        }
+        return SparseOperator(self.num_qubits, _prune(columns))
+
+    def compose(self, other: "SparseOperator") -> "SparseOperator":
+        """Returns the product ``self * other``, i.e. ``other`` is applied first"""
+        _check_same_size(self, other)
+        columns: Columns = {}
+        for j, column in other.columns.items():
+            new_column: Dict[int, sympy.Expr] = {}
+            for k, entry in column.items():
+                for i, self_entry in self.columns.get(k, {}).items():
+                    product = self_entry * entry
+                    new_column[i] = new_column[i] + product if i in new_column else product
+            columns[j] = new_column
+        return SparseOperator(self.num_qubits, _prune(columns))
+
+    def tensor(self, other: "SparseOperator") -> "SparseOperator":
+        """Returns the tensor product with ``self`` on the more significant qubits"""
+        shift = other.num_qubits
+        columns = {
+            (j << shift)
+            | other_j: {
+                (i << shift) | other_i: entry * other_entry
+                for i, entry in column.items()
+                for other_i, other_entry in other_column.items()
+            }
+            for j, column in self.columns.items()
+            for other_j, other_column in other.columns.items()
+        }
+        return SparseOperator(self.num_qubits + other.num_qubits, columns)
+
+
+class LoweredFactor(NamedTuple):
+    """The operators one factor of a product applies, each with the qubits it acts on"""
+
+    # The size of register the factor is written for, or None if its gates name their qubits
+    num_qubits: Optional[int]
+    steps: List[Tuple[SparseOperator, Tuple[int, ...]]]
+
+
+def resolve_targets(operator: SparseOperator, targets: Targets, num_qubits: int) -> Tuple[int, ...]:
+    """Checks that an operator can act on the given qubits of a register
+    Args:
+        operator: The operator to apply
+        targets: The qubits it acts on, most significant first, or None for the whole register
+        num_qubits: The size of the register
+    Returns:
+        The targeted qubits
+    """
+    if targets is None:
+        if operator.num_qubits != num_qubits:
+            raise ValueError(
+                f"A {operator.num_qubits} qubit operator cannot act on {num_qubits} qubits"
+            )
+        return _register(num_qubits)
+    if len(targets) != operator.num_qubits or not all(
+        0 <= target < num_qubits for target in targets
+    ):
+        raise ValueError(f"Invalid targets {targets} for a {num_qubits} qubit state")
+    return targets
+
+
+def check_register(factor: LoweredFactor, num_qubits: int) -> None:
+    """Checks that a factor written for a whole register acts on a register of the same size"""
+    if factor.num_qubits is not None and factor.num_qubits != num_qubits:
+        raise ValueError(f"A {factor.num_qubits} qubit operator cannot act on {num_qubits} qubits")
+
+
+def _check_same_size(first: SparseOperator, second: SparseOperator) -> None:
+    if first.num_qubits != second.num_qubits:
+        raise ValueError(
+            f"Operators act on {first.num_qubits} and {second.num_qubits} qubits respectively"
+        )
+
+
+def _prune(columns: Columns) -> Columns:
+    pruned = {}
+    for j, column in columns.items():
+        new_column = {i: entry for i, entry in column.items() if entry != 0}
+        if new_column:
+            pruned[j] = new_column
+    return pruned
+
+
+def basis_label(expr: Union[Ket, Bra]) -> str:
+    """Returns the label of a computational basis ket or bra as a string of bits
+    Args:
+        expr: A ket, bra or qubit such as Ket(0) or Qubit("01")
+    Returns:
+        The bits of the label, for example "01"
+    """
+    label = "".join(str(part) for part in expr.label)
+    if not label or set(label) - {"0", "1"}:
+        raise ValueError(f"{expr} is not a computational basis state")
+    return label
+
+
+def is_base_symbol(expr: sympy.Basic) -> bool:
+    return isinstance(expr, sympy.Symbol) and expr.name in _BASE_SYMBOLS
+
+
+def is_integer(expr: sympy.Basic) -> bool:
+    """Returns whether an expression, such as a symbol declared with integer=True, is an integer"""
+    return expr.is_integer is True  # type: ignore[attr-defined]
+
+
+def from_matrix(matrix: sympy.Matrix) -> SparseOperator:
+    """Converts a square matrix to a SparseOperator
+    Args:
+        matrix: A 2^n by 2^n matrix
+    Returns:
+        The same operator keeping only its nonzero entries
+    """
+    num_qubits = (matrix.shape[0] - 1).bit_length()
+    columns = {
+        j: {i: sympy.sympify(matrix[i, j]) for i in range(matrix.shape[0])}
+        for j in range(matrix.shape[1])
+    }
+    return SparseOperator(num_qubits, _prune(columns))
+
+
+def to_sparse_matrix(operator: SparseOperator) -> sympy.SparseMatrix:
+    """Converts a SparseOperator to a sympy SparseMatrix, which stores its nonzero entries only
+    Args:
+        operator: The operator
+    Returns:
+        The 2^n by 2^n matrix of the operator
+    """
+    size = 2**operator.num_qubits
+    entries = {
+        (i, j): entry for j, column in operator.columns.items() for i, entry in column.items()
+    }
+    return sympy.SparseMatrix(size, size, entries)
+
+
+def to_dirac(operator: SparseOperator) -> sympy.Expr:
+    """Converts a SparseOperator back to a sum of outer products, such as x = |0><1| + |1><0|
+    Args:
+        operator: The operator
+    Returns:
+        The operator in Dirac notation. Operators on more than one qubit are written as tensor
+        products of one outer product per qubit, like cx
+    """
+    terms = []
+    for j, column in sorted(operator.columns.items()):
+        for i, entry in sorted(column.items()):
+            factors = [
+                Ket((i >> shift) & 1) * Bra((j >> shift) & 1)
+                for shift in reversed(range(operator.num_qubits))
+            ]
+            outer = TensorProduct(*factors) if len(factors) > 1 else factors[0]
+            terms.append(entry * outer)
+    return sympy.Add(*terms)
+
+
+GATE_TABLE: Dict[Type[Gate], SparseOperator] = {
+    IdentityGate: from_matrix(sympy.eye(2)),
+    XGate: from_matrix(sympy.Matrix([[0, 1], [1, 0]])),
+    YGate: from_matrix(sympy.Matrix([[0, -sympy.I], [sympy.I, 0]])),
+    ZGate: from_matrix(sympy.Matrix([[1, 0], [0, -1]])),
+    HadamardGate: from_matrix(sympy.Matrix([[1, 1], [1, -1]]) / sympy.sqrt(2)),
+    CNotGate: from_matrix(sympy.Matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]])),
+}
+_OPERATOR_TABLE: Dict[sympy.Basic, SparseOperator] = {}
+
+
+def register_operator(expr: sympy.Expr) -> SparseOperator:
+    """Precomputes the action of an operator so that later products containing it look it up
+    instead of converting it again
+    Args:
+        expr: An operator built from outer products, such as the Pauli matrices
+    Returns:
+        The action of the operator
+    """
+    _OPERATOR_TABLE[expr] = _lower_dirac(expr)
+    return _OPERATOR_TABLE[expr]
+
+
+def _power(base: SparseOperator, exp: sympy.Expr) -> SparseOperator:
+    identity = SparseOperator.identity(base.num_qubits)
+    if is_integer(exp) and not (exp.is_Integer and exp >= 0) and base.compose(base).is_identity():
+        # An involution P has P**n = (1 + P)/2 + (-1)**n * (1 - P)/2 for any integer n
+        half = sympy.Rational(1, 2)
+        even_part = identity.add(base).scale(half)
+        odd_part = identity.add(base.scale(sympy.Integer(-1))).scale((-1) ** exp * half)
+        return even_part.add(odd_part)
+    if not (exp.is_Integer and exp >= 0):
+        raise ValueError(f"Cannot raise an operator to the power {exp}")
+
+    # Exponentiation by squaring
+    power, square, remaining = identity, base, int(exp)
+    while remaining:
+        if remaining & 1:
+            power = square.compose(power)
+        remaining >>= 1
+        if remaining:
+            square = square.compose(square)
+    return power
+
+
+def _lower_gate(gate: Gate) -> Tuple[SparseOperator, Targets]:
+    controls = tuple(gate.controls) if isinstance(gate, CGate) else ()
+    targets = tuple(int(qubit) for qubit in controls + tuple(gate.targets))
+    if type(gate) in GATE_TABLE:
+        return GATE_TABLE[type(gate)], targets
+
+    target_operator = from_matrix(gate.get_target_matrix(format="sympy"))
+    if not controls:
+        return target_operator, targets
+
+    # The controls are the most significant bits, so the target operator only acts on the
+    # columns where all of them are set
+    offset = (2 ** len(controls) - 1) << target_operator.num_qubits
+    columns: Columns = {j: {j: sympy.Integer(1)} for j in range(offset)}
+    for j, column in target_operator.columns.items():
+        columns[offset | j] = {offset | i: entry for i, entry in column.items()}
+    return SparseOperator(len(targets), columns), targets
+
+
+def _lower_dirac(expr: sympy.Basic) -> SparseOperator:  # noqa: C901
+    if expr in _OPERATOR_TABLE:
+        return _OPERATOR_TABLE[expr]
+    if isinstance(expr, OuterProduct):
+        ket_label = basis_label(expr.ket)
+        bra_label = basis_label(expr.bra)
+        if len(ket_label) != len(bra_label):
+            raise ValueError(f"{expr} is not a square operator")
+        return SparseOperator(
+            len(ket_label), {int(bra_label, 2): {int(ket_label, 2): sympy.Integer(1)}}
+        )
+    if is_base_symbol(expr):
+        ket_bit, bra_bit = _BASE_SYMBOLS[str(expr)]
+        return SparseOperator(1, {bra_bit: {ket_bit: sympy.Integer(1)}})
+    if isinstance(expr, sympy.Add):
+        operators = [_lower_dirac(arg) for arg in expr.args]
+        total = operators[0]
+        for operator in operators[1:]:
+            total = total.add(operator)
+        return total
+    if isinstance(expr, sympy.Mul):
+        scalars = [arg for arg in expr.args if arg.is_commutative and not is_base_symbol(arg)]
+        factors = [_lower_dirac(arg) for arg in expr.args if arg not in scalars]
+        if not factors:
+            raise ValueError(f"{expr} is a scalar, not an operator")
+        product = factors[0]
+        for factor in factors[1:]:
+            product = product.compose(factor)
+        return product.scale(sympy.Mul(*scalars))
+    if isinstance(expr, TensorProduct):
+        operators = [_lower_dirac(arg) for arg in expr.args]
+        total = operators[0]
+        for operator in operators[1:]:
+            total = total.tensor(operator)
+        return total
+    if isinstance(expr, sympy.Pow):
+        return _power(_lower_dirac(expr.base), expr.exp)
+    raise ValueError(f"Cannot convert {expr} to an operator")
+
+
+def lower_operator(expr: sympy.Expr) -> Tuple[SparseOperator, Targets]:
+    """Converts one operator factor of a product into a SparseOperator
+    Args:
+        expr: A sympy gate such as XGate(0), or an operator built from outer products
+    Returns:
+        The operator and the qubits it targets. Operators built from outer products act on the
+        whole register, which is signalled by targets of None
+    """
+    if isinstance(expr, Gate):
+        return _lower_gate(expr)
+    if isinstance(expr, sympy.Pow) and isinstance(expr.base, Gate):
+        base, targets = _lower_gate(expr.base)
+        return _power(base, expr.exp), targets
+    return _lower_dirac(expr), None
+
+
+def lower_factor(expr: sympy.Expr) -> LoweredFactor:
+    """Converts one operator factor of a product into operators on the qubits it changes.
+
+    The factors of a tensor product of operators are kept apart and applied to their own qubits
+    only, and identity factors are dropped, so ``TensorProduct(h, i, i)`` costs as much as ``h``
+    rather than an eight by eight operator. A power of a tensor product raises each factor to the
+    power instead, as (A x B)**n = A**n x B**n.
+        Args:
+            expr: A sympy gate, an operator built from outer products or a tensor product of them
+        Returns:
+            The operators with the qubits they act on, most significant first
+    """
+    if (
+        isinstance(expr, sympy.Pow)
+        and isinstance(expr.base, TensorProduct)
+        and expr.base not in _OPERATOR_TABLE
+    ):
+        return _lower_factors([_power(_lower_dirac(arg), expr.exp) for arg in expr.base.args])
+    if not isinstance(expr, TensorProduct) or expr in _OPERATOR_TABLE:
+        operator, targets = lower_operator(expr)
+        if targets is None:
+            return LoweredFactor(operator.num_qubits, [(operator, _register(operator.num_qubits))])
+        return LoweredFactor(None, [(operator, targets)])
+    return _lower_factors([_lower_dirac(arg) for arg in expr.args])
+
+
+def _lower_factors(operators: List[SparseOperator]) -> LoweredFactor:
+    # The factors of a tensor product on consecutive qubits, the first one most significant
+    num_qubits = sum(operator.num_qubits for operator in operators)
+    steps = []
+    offset = num_qubits
+    for operator in operators:
+        offset -= operator.num_qubits
+        if not operator.is_identity():
+            targets = tuple(qubit + offset for qubit in _register(operator.num_qubits))
+            steps.append((operator, targets))
+    return LoweredFactor(num_qubits, steps)
+
+
+def _register(num_qubits: int) -> Tuple[int, ...]:
+    return tuple(range(num_qubits - 1, -1, -1))
@@ -0,0 +1,162 @@
+import pytest
+import sympy
+from sympy.physics.quantum import Bra, Ket, OuterProduct, TensorProduct
+from sympy.physics.quantum.gate import CGate, CNotGate, PhaseGate, XGate, YGate
+from sympy.physics.quantum.qubit import Qubit
+
+from symboliq.dirac_notation import B_2, b_0, b_1, b_3, cx, h, i, ket_0, ket_1, x
+from symboliq.operators import (
+    _OPERATOR_TABLE,
+    GATE_TABLE,
+    LoweredFactor,
+    SparseOperator,
+    basis_label,
+    from_matrix,
+    is_base_symbol,
+    lower_factor,
+    lower_operator,
+    register_operator,
+    to_dirac,
+    to_sparse_matrix,
+)
+from symboliq.sparse_state import SparseState
+
+one = sympy.Integer(1)
+sparse_x = SparseOperator(1, {0: {1: one}, 1: {0: one}})
+sparse_i = SparseOperator.identity(1)
+
+
+def test_sparse_operator_eq_and_repr() -> None:
+    assert sparse_x == SparseOperator(1, {1: {0: one}, 0: {1: one}})
+    assert sparse_x != sparse_i
+    assert sparse_x != "X"
+    assert repr(sparse_x) == "SparseOperator(1, {0: {1: 1}, 1: {0: 1}})"
+
+
+def test_sparse_operator_arithmetic() -> None:
+    assert sparse_x.add(sparse_i) == SparseOperator(1, {0: {0: one, 1: one}, 1: {0: one, 1: one}})
+    assert sparse_x.add(sparse_x.scale(-one)) == SparseOperator(1, {})
+    assert sparse_x.compose(sparse_x) == sparse_i
+    assert sparse_x.scale(sympy.Integer(0)) == SparseOperator(1, {})
+    assert sparse_x.tensor(sparse_i) == lower_operator(TensorProduct(x, i))[0]
+    with pytest.raises(ValueError, match="1 and 2 qubits"):
+        sparse_x.compose(SparseOperator.identity(2))
+
+
+def test_basis_label() -> None:
+    assert basis_label(ket_1) == "1"
+    assert basis_label(Qubit("01")) == "01"
+    with pytest.raises(ValueError, match="not a computational basis state"):
+        basis_label(Ket("psi"))
+
+
+def test_is_base_symbol() -> None:
+    assert is_base_symbol(B_2)
+    assert not is_base_symbol(sympy.Symbol("alpha"))
+    assert not is_base_symbol(x)
+
+
+def test_from_matrix() -> None:
+    assert from_matrix(sympy.Matrix([[0, 1], [1, 0]])) == sparse_x
+
+
+def test_to_sparse_matrix() -> None:
+    matrix = to_sparse_matrix(GATE_TABLE[CNotGate])
+    assert isinstance(matrix, sympy.SparseMatrix)
+    assert matrix == sympy.Matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]])
+
+
+def test_to_dirac() -> None:
+    assert to_dirac(sparse_x) == x
+    assert to_dirac(SparseOperator(1, {})) == 0
+    assert lower_operator(to_dirac(GATE_TABLE[CNotGate]))[0] == GATE_TABLE[CNotGate]
+    assert to_dirac(lower_operator(TensorProduct(b_0, b_1))[0]) == TensorProduct(b_0, b_1)
+    assert from_matrix(sympy.Matrix(to_sparse_matrix(lower_operator(h)[0]))) == lower_operator(h)[0]
+
+
+def test_lower_dirac_constants() -> None:
+    assert lower_operator(x) == (sparse_x, None)
+    assert lower_operator(b_1)[0] == SparseOperator(1, {1: {0: one}})
+    assert lower_operator(B_2)[0] == SparseOperator(1, {0: {1: one}})
+    assert lower_operator(i * x)[0] == sparse_x
+    assert lower_operator(x**2)[0] == sparse_i
+    assert lower_operator(h)[0] == from_matrix(sympy.Matrix([[1, 1], [1, -1]]) / sympy.sqrt(2))
+    assert lower_operator(cx)[0] == from_matrix(
+        sympy.Matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]])
+    )
+    assert lower_operator(b_0 + b_3)[0] == sparse_i
+
+
+def test_lower_gates() -> None:
+    assert lower_operator(XGate(0)) == (sparse_x, (0,))
+    assert lower_operator(sympy.Pow(YGate(2), 2, evaluate=False)) == (sparse_i, (2,))
+    assert lower_operator(CNotGate(1, 0)) == (lower_operator(cx)[0], (1, 0))
+    assert lower_operator(XGate(3))[0] is GATE_TABLE[XGate]
+    assert lower_operator(PhaseGate(1)) == (
+        SparseOperator(1, {0: {0: one}, 1: {1: sympy.I}}),
+        (1,),
+    )
+    toffoli, targets = lower_operator(CGate((0, 1), XGate(2)))
+    assert targets == (0, 1, 2)
+    state = SparseState(3, {0b110: one})
+    state.apply(toffoli)
+    assert state.amplitudes == {0b111: one}
+
+
+def test_lower_operator_errors() -> None:
+    with pytest.raises(ValueError, match="not a square operator"):
+        lower_operator(OuterProduct(Ket("01"), Bra(0)))
+    with pytest.raises(ValueError, match="is a scalar"):
+        lower_operator(sympy.Symbol("a") * sympy.Symbol("b"))
+    with pytest.raises(ValueError, match="Cannot raise"):
+        lower_operator(x ** sympy.Symbol("n"))
+    with pytest.raises(ValueError, match="Cannot convert"):
+        lower_operator(ket_0)
+
+
+def test_operator_powers() -> None:
+    phase = SparseOperator(1, {0: {0: one}, 1: {1: sympy.I}})
+    assert lower_operator(sympy.Pow(b_0 + sympy.I * b_3, 10**6 + 1))[0] == phase
+    assert lower_operator(sympy.Pow(h, 10**6))[0] == sparse_i
+    assert lower_operator(sympy.Pow(cx, 0, evaluate=False))[0] == SparseOperator.identity(2)
+
+    n = sympy.Symbol("n", integer=True)
+    even, odd = (1 + (-1) ** n) / 2, (1 - (-1) ** n) / 2
+    assert lower_operator(x**n)[0] == SparseOperator(
+        1, {0: {0: even, 1: odd}, 1: {0: odd, 1: even}}
+    )
+    assert lower_operator(sympy.Pow(x, -3))[0] == sparse_x
+    with pytest.raises(ValueError, match="Cannot raise"):
+        lower_operator(sympy.Pow(b_0 + sympy.I * b_3, n))
+
+
+def test_register_operator() -> None:
+    assert b_0 + b_1 not in _OPERATOR_TABLE
+    try:
+        operator = register_operator(b_0 + b_1)
+        assert operator == SparseOperator(1, {0: {0: one}, 1: {0: one}})
+        assert lower_operator(b_0 + b_1)[0] is operator
+    finally:
+        # The table is shared by the whole process
+        del _OPERATOR_TABLE[b_0 + b_1]
+    assert lower_operator(x)[0] is lower_operator(x)[0]
+
+
+def test_lower_factor() -> None:
+    assert sparse_i.is_identity()
+    assert not sparse_x.is_identity()
+    assert not SparseOperator(1, {0: {0: one}}).is_identity()
+
+    assert lower_factor(XGate(2)) == LoweredFactor(None, [(sparse_x, (2,))])
+    assert lower_factor(x) == LoweredFactor(1, [(sparse_x, (0,))])
+    assert lower_factor(TensorProduct(i, x, i)) == LoweredFactor(3, [(sparse_x, (1,))])
+    assert lower_factor(TensorProduct(i, i)) == LoweredFactor(2, [])
+    assert lower_factor(TensorProduct(cx, i, x)) == LoweredFactor(
+        4, [(lower_operator(cx)[0], (3, 2)), (sparse_x, (0,))]
+    )
+    assert lower_factor(TensorProduct(i, x, i) ** 3) == LoweredFactor(3, [(sparse_x, (1,))])
+    assert lower_factor(TensorProduct(x, i) ** 10**6) == LoweredFactor(2, [])
+    assert lower_factor(TensorProduct(h, x) ** (10**6 + 1)) == LoweredFactor(
+        2, [(lower_operator(h)[0], (1,)), (sparse_x, (0,))]
+    )
+    assert lower_factor(sympy.Pow(TensorProduct(i, x), 0, evaluate=False)) == LoweredFactor(2, [])
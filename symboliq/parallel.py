@@ -0,0 +1,31 @@
+import concurrent.futures
+from typing import Callable, Iterable, Iterator, TypeVar
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+
+def parallel_map(
+    function: Callable[[ItemT], ResultT],
+    items: Iterable[ItemT],
+    max_workers: int = 1,
+    chunksize: int = 1,
+) -> Iterator[ResultT]:
+    """Maps a function over items, in a pool of worker processes when more than one worker is
+    requested. Results are yielded in the same order as the items, so merging them does not
+    depend on which worker finishes first.
+        Args:
+            function: A module level function, so that it can be pickled
+            items: The arguments, which must be picklable (sympy expressions are)
+            max_workers: The number of processes to use, 1 runs everything in this process
+            chunksize: How many items to send to a worker at a time
+        Returns:
+            An iterator over the results
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    if max_workers == 1:
+        yield from map(function, items)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(function, items, chunksize=chunksize)
@@ -0,0 +1,17 @@
+import pytest
+
+from symboliq.parallel import parallel_map
+
+
+def _square(number: int) -> int:
+    return number * number
+
+
+def test_parallel_map() -> None:
+    assert list(parallel_map(_square, range(5))) == [0, 1, 4, 9, 16]
+    assert list(parallel_map(_square, range(5), max_workers=2, chunksize=2)) == [0, 1, 4, 9, 16]
+
+
+def test_parallel_map_invalid_workers() -> None:
+    with pytest.raises(ValueError, match="at least 1"):
+        list(parallel_map(_square, range(5), max_workers=0))
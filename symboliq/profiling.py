@@ -0,0 +1,93 @@
+import contextlib
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+import sympy
+
+ResultT = TypeVar("ResultT")
+
+
+class PhaseStats:
+    """The number of calls to one phase of the simplification, the wall time they took and the
+    sizes, in sympy nodes, of the expressions they were given
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.total_size = 0
+        self.max_size = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"PhaseStats(calls={self.calls}, total_seconds={self.total_seconds:.6f}, "
+            f"mean_size={self.mean_size:.1f}, max_size={self.max_size})"
+        )
+
+    @property
+    def mean_size(self) -> float:
+        return self.total_size / self.calls if self.calls else 0.0
+
+
+class Profiler:
+    """Collects PhaseStats for every phase timed while it is active"""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, PhaseStats] = {}
+
+    def record(self, phase: str, seconds: float, size: int) -> None:
+        stats = self.phases.setdefault(phase, PhaseStats())
+        stats.calls += 1
+        stats.total_seconds += seconds
+        stats.total_size += size
+        stats.max_size = max(stats.max_size, size)
+
+    def report(self) -> str:
+        """Returns a table of the phases, the slowest first"""
+        lines = [f"{'phase':<26}{'calls':>8}{'seconds':>12}{'mean size':>12}{'max size':>10}"]
+        for phase, stats in sorted(self.phases.items(), key=lambda item: -item[1].total_seconds):
+            lines.append(
+                f"{phase:<26}{stats.calls:>8}{stats.total_seconds:>12.6f}"
+                f"{stats.mean_size:>12.1f}{stats.max_size:>10}"
+            )
+        return "\n".join(lines)
+
+
+_profiler: Optional[Profiler] = None
+
+
+@contextlib.contextmanager
+def profile() -> Iterator[Profiler]:
+    """Times the phases of every simplification run inside the block.
+
+        >> with profile() as profiler:
+        ..     qapply(cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0))
+        >> print(profiler.report())
+
+    Work done in worker processes (max_workers > 1) is not recorded.
+        Returns:
+            The Profiler collecting the statistics
+    """
+    global _profiler  # pylint: disable=global-statement
+    previous, _profiler = _profiler, Profiler()
+    try:
+        yield _profiler
+    finally:
+        _profiler = previous
+
+
+def timed(
+    phase: str, function: Callable[..., ResultT], expr: Any, *args: Any, **kwargs: Any
+) -> ResultT:
+    """Calls ``function(expr, *args, **kwargs)``, recording its wall time and the size of
+    ``expr`` under ``phase`` if a profiler is active. Otherwise this only costs one extra call.
+    """
+    if _profiler is None:
+        return function(expr, *args, **kwargs)
+    profiler = _profiler
+    start = time.perf_counter()
+    result = function(expr, *args, **kwargs)
+    seconds = time.perf_counter() - start
+    size = sum(1 for _ in sympy.preorder_traversal(expr)) if isinstance(expr, sympy.Basic) else 0
+    profiler.record(phase, seconds, size)
+    return result
@@ -0,0 +1,62 @@
+from sympy.physics.quantum import Ket, TensorProduct
+
+from symboliq import profiling
+from symboliq.dirac_notation import (
+    cx,
+    gate_reduce_cache,
+    h,
+    i,
+    inner_product_cache,
+    ket_0,
+    qapply,
+    x,
+)
+
+
+def test_phase_stats() -> None:
+    stats = profiling.PhaseStats()
+    assert stats.mean_size == 0
+    assert repr(stats) == "PhaseStats(calls=0, total_seconds=0.000000, mean_size=0.0, max_size=0)"
+
+    profiler = profiling.Profiler()
+    profiler.record("expand", 0.5, 3)
+    profiler.record("expand", 0.25, 5)
+    profiler.record("srepr", 1.0, 2)
+    stats = profiler.phases["expand"]
+    assert (stats.calls, stats.total_seconds, stats.mean_size, stats.max_size) == (2, 0.75, 4, 5)
+    assert profiler.report().splitlines() == [
+        "phase                        calls     seconds   mean size  max size",
+        "srepr                            1    1.000000         2.0         2",
+        "expand                           2    0.750000         4.0         5",
+    ]
+
+
+def test_profile() -> None:
+    inner_product_cache.clear()
+    gate_reduce_cache.clear()
+    bell = cx * TensorProduct(h, i) * TensorProduct(ket_0, ket_0)
+    with profiling.profile() as profiler:
+        qapply(bell)
+        qapply(x * ket_0)
+        qapply(TensorProduct(x, i) * TensorProduct(Ket("psi"), ket_0))
+        with profiling.profile() as inner_profiler:
+            assert profiling.timed("len", len, "abc") == 3
+        assert inner_profiler.phases["len"].max_size == 0
+    assert set(profiler.phases) == {
+        "complex_symbol_check",
+        "apply_factorwise",
+        "sub_pauli_hadamard",
+        "expand",
+        "expand_tensor_product",
+        "tensor_product_simp_fork",
+        "factor_tensor",
+        "inner_product",
+    }
+    assert all(stats.calls > 0 and stats.max_size > 0 for stats in profiler.phases.values())
+
+    # Nothing is recorded outside of the block
+    check_calls = profiler.phases["complex_symbol_check"].calls
+    qapply(bell)
+    assert profiling.timed("len", len, "abc") == 3
+    assert profiler.phases["complex_symbol_check"].calls == check_calls
+    assert "len" not in profiler.phases
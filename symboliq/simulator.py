@@ -0,0 +1,101 @@
+from typing import List, Optional, Tuple, Union
+
+import sympy
+
+from symboliq.dirac_notation import DiracNotation, split_product
+from symboliq.operators import lower_factor
+from symboliq.sparse_state import SparseState
+
+BACKENDS = ("symbolic", "sparse")
+
+State = Union[sympy.Expr, SparseState]
+
+
+class Simulator:
+    """The state a circuit has reached so far, to which gates are applied one at a time, so that
+    appending a gate to a long circuit only costs that gate.
+
+    A checkpoint saves the current state, and rolling back to it undoes every gate applied since.
+    On the symbolic backend the state is an immutable sympy expression, so a checkpoint only
+    keeps a reference to it. On the sparse backend it copies the map of amplitudes, whose
+    amplitudes are shared rather than copied.
+
+        >> simulator = Simulator(TensorProduct(ket_0, ket_0))
+        >> simulator.apply(TensorProduct(h, i))
+        >> checkpoint = simulator.checkpoint()
+        >> simulator.apply(cx)
+        >> simulator.state
+        sqrt(2)*|0>x|0>/2 + sqrt(2)*|1>x|1>/2
+        >> simulator.rollback(checkpoint)
+        >> simulator.state
+        sqrt(2)*|0>x|0>/2 + sqrt(2)*|1>x|0>/2
+    """
+
+    def __init__(self, state: sympy.Expr, backend: str = "symbolic", coefficients: str = "eager"):
+        """Starts a simulation
+        Args:
+            state: The initial state
+            backend: "symbolic" applies each gate like DiracNotation.handle_mul. "sparse" keeps
+                the state as a map from computational basis states to amplitudes
+            coefficients: How the symbolic backend simplifies amplitudes, as in DiracNotation
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self._backend = backend
+        self._notation = DiracNotation(state, coefficients=coefficients)
+        self._state: State = SparseState.from_expr(state) if backend == "sparse" else state
+        self.gates: List[sympy.Expr] = []
+        self._checkpoints: List[Tuple[int, State]] = []
+
+    def __repr__(self) -> str:
+        return f"Simulator({self.state}, backend={self._backend!r})"
+
+    @property
+    def state(self) -> sympy.Expr:
+        """The current state as a sympy expression"""
+        if isinstance(self._state, SparseState):
+            return self._state.to_expr()
+        return self._state
+
+    def apply(self, gate: sympy.Expr) -> None:
+        """Applies a gate, or a product of gates and scalars, to the current state
+        Args:
+            gate: The operator to apply, without a state
+        """
+        coefficient, operators = split_product(gate)
+        if isinstance(self._state, SparseState):
+            for operator in reversed(operators):
+                self._state.apply_factor(lower_factor(operator))
+            self._state.scale(coefficient)
+        else:
+            state = self._state
+            for operator in reversed(operators):
+                state = self._notation.apply_operator(operator, state)
+            # The symbolic rules do not expect scalars next to a sum, so the coefficient is
+            # multiplied into every term instead
+            self._state = sympy.Add(*[coefficient * term for term in sympy.Add.make_args(state)])
+        self.gates.append(gate)
+
+    def checkpoint(self) -> int:
+        """Saves the current state
+        Returns:
+            A handle to pass to rollback
+        """
+        state = self._state.copy() if isinstance(self._state, SparseState) else self._state
+        self._checkpoints.append((len(self.gates), state))
+        return len(self._checkpoints) - 1
+
+    def rollback(self, checkpoint: Optional[int] = None) -> None:
+        """Restores the state saved by a checkpoint and forgets the checkpoints taken after it
+        Args:
+            checkpoint: A handle from checkpoint, by default the most recent one
+        """
+        if checkpoint is None:
+            checkpoint = len(self._checkpoints) - 1
+        if not 0 <= checkpoint < len(self._checkpoints):
+            raise ValueError(f"There is no checkpoint {checkpoint}")
+        del self._checkpoints[checkpoint + 1 :]
+        num_gates, state = self._checkpoints[checkpoint]
+        del self.gates[num_gates:]
+        # The saved state is copied again so that the checkpoint can be rolled back to twice
+        self._state = state.copy() if isinstance(state, SparseState) else state
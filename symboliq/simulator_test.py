@@ -0,0 +1,90 @@
+import pytest
+import sympy
+from sympy import Symbol
+from sympy.physics.quantum import TensorProduct
+from sympy.physics.quantum.gate import HadamardGate, XGate
+from sympy.physics.quantum.qubit import Qubit
+
+import symboliq
+from symboliq.dirac_notation import cx, h, i, ket_0, ket_1, x
+from symboliq.simulator import Simulator
+
+BELL = sympy.sqrt(2) / 2 * TensorProduct(ket_0, ket_0) + sympy.sqrt(2) / 2 * TensorProduct(
+    ket_1, ket_1
+)
+
+
+@pytest.mark.parametrize("backend", ["symbolic", "sparse"])
+def test_apply(backend: str) -> None:
+    simulator = Simulator(TensorProduct(ket_0, ket_0), backend=backend)
+    simulator.apply(TensorProduct(h, i))
+    simulator.apply(cx)
+    assert simulator.state == BELL
+    assert simulator.gates == [TensorProduct(h, i), cx]
+    assert repr(simulator) == f"Simulator({BELL}, backend={backend!r})"
+
+    # A product is applied right to left, like the factors of a product reduced by qapply
+    simulator.apply(TensorProduct(x, i) ** 3 * Symbol("a") * TensorProduct(i, x))
+    expected = symboliq.qapply(
+        TensorProduct(x, i) ** 3 * Symbol("a") * TensorProduct(i, x) * BELL, backend="sparse"
+    )
+    assert sympy.expand(simulator.state - expected) == 0
+
+
+@pytest.mark.parametrize("backend", ["symbolic", "sparse"])
+def test_symbolic_amplitudes(backend: str) -> None:
+    alpha, beta = sympy.symbols("alpha beta")
+    simulator = Simulator(alpha * ket_0, backend=backend)
+    simulator.apply(x)
+    assert simulator.state == alpha * ket_1
+
+    simulator = Simulator(alpha * ket_0 + beta * ket_1, backend=backend)
+    simulator.apply(h)
+    expected = symboliq.qapply(h * (alpha * ket_0 + beta * ket_1), backend="sparse")
+    assert sympy.expand(simulator.state - expected) == 0
+
+    # The coefficient of a gate stays on the state when the next gate is applied
+    simulator = Simulator(ket_0, backend=backend)
+    simulator.apply(Symbol("a") * x)
+    simulator.apply(x)
+    assert simulator.state == Symbol("a") * ket_0
+
+
+@pytest.mark.parametrize("backend", ["symbolic", "sparse"])
+def test_checkpoints(backend: str) -> None:
+    simulator = Simulator(TensorProduct(ket_0, ket_0), backend=backend)
+    first = simulator.checkpoint()
+    simulator.apply(TensorProduct(h, i))
+    second = simulator.checkpoint()
+    simulator.apply(cx)
+    assert simulator.state == BELL
+
+    simulator.rollback()
+    assert simulator.state == symboliq.qapply(TensorProduct(h, i) * TensorProduct(ket_0, ket_0))
+    assert simulator.gates == [TensorProduct(h, i)]
+    # Rolling back does not change the checkpoint, so it can be rolled back to again
+    simulator.apply(TensorProduct(i, x))
+    simulator.rollback(second)
+    simulator.apply(cx)
+    assert simulator.state == BELL
+
+    simulator.rollback(first)
+    assert simulator.state == TensorProduct(ket_0, ket_0)
+    assert simulator.gates == []
+    with pytest.raises(ValueError, match="There is no checkpoint 1"):
+        simulator.rollback(second)
+
+
+def test_sparse_gates() -> None:
+    simulator = Simulator(Qubit("00"), backend="sparse")
+    simulator.apply(XGate(0) * HadamardGate(1))
+    assert simulator.state == symboliq.qapply(
+        XGate(0) * HadamardGate(1) * Qubit("00"), backend="sparse"
+    )
+
+
+def test_invalid_arguments() -> None:
+    with pytest.raises(ValueError, match="Unknown backend 'numeric'"):
+        Simulator(ket_0, backend="numeric")
+    with pytest.raises(ValueError, match="There is no checkpoint -1"):
+        Simulator(ket_0).rollback()
@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import sympy
+from sympy.physics.quantum import Ket, TensorProduct
+
+from symboliq.operators import (
+    LoweredFactor,
+    SparseOperator,
+    Targets,
+    basis_label,
+    check_register,
+    resolve_targets,
+)
+
+Amplitudes = Dict[int, sympy.Expr]
+
+
+class SparseState:
+    """A state stored as a map from computational basis index to amplitude.
+
+    Only the nonzero amplitudes are kept, so applying a gate touches as many terms as the state
+    has rather than re-simplifying a whole sympy expression. Basis indices are read like a
+    ``Qubit`` label: the leftmost tensor factor is the most significant bit, and the qubit ``k``
+    targeted by a gate such as ``XGate(k)`` is bit ``k``.
+    """
+
+    def __init__(self, num_qubits: int, amplitudes: Optional[Amplitudes] = None):
+        self.num_qubits = num_qubits
+        self.amplitudes: Amplitudes = {} if amplitudes is None else amplitudes
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SparseState):
+            return NotImplemented
+        return self.num_qubits == other.num_qubits and self.amplitudes == other.amplitudes
+
+    def __repr__(self) -> str:
+        return f"SparseState({self.num_qubits}, {self.amplitudes})"
+
+    @classmethod
+    def from_expr(cls, expr: sympy.Expr) -> "SparseState":
+        """Converts a sympy state to a SparseState
+        Args:
+            expr: A sum of computational basis states such as alpha*|0>x|1> + beta*|1>x|0>
+        Returns:
+            The state as a map from basis index to amplitude
+        """
+        terms: List[Tuple[sympy.Expr, str]] = []
+        _collect_terms(expr, sympy.Integer(1), terms)
+        widths = {len(label) for _, label in terms}
+        if len(widths) != 1:
+            raise ValueError(f"{expr} mixes states of different numbers of qubits")
+        state = cls(widths.pop())
+        for coefficient, label in terms:
+            state._add_amplitude(int(label, 2), coefficient)
+        state.amplitudes = _drop_zeros(state.amplitudes)
+        return state
+
+    def to_expr(self) -> sympy.Expr:
+        """Converts the state back to a sum of kets (or tensor products of kets)
+        Returns:
+            The state as a sympy expression
+        """
+        terms = [
+            coefficient * self._basis_expr(index)
+            for index, coefficient in sorted(self.amplitudes.items())
+        ]
+        return sympy.Add(*terms)
+
+    def _basis_expr(self, index: int) -> sympy.Expr:
+        bits = format(index, f"0{self.num_qubits}b")
+        if self.num_qubits == 1:
+            return Ket(int(bits))
+        return TensorProduct(*[Ket(int(bit)) for bit in bits])
+
+    def copy(self) -> "SparseState":
+        return SparseState(self.num_qubits, dict(self.amplitudes))
+
+    def _add_amplitude(self, index: int, amplitude: sympy.Expr) -> None:
+        if index in self.amplitudes:
+            self.amplitudes[index] = self.amplitudes[index] + amplitude
+        else:
+            self.amplitudes[index] = amplitude
+
+    def apply(self, operator: SparseOperator, targets: Targets = None) -> None:
+        """Applies an operator to the state in place
+        Args:
+            operator: The operator to apply
+            targets: The qubits the operator acts on, most significant first. None means the
+                operator acts on the whole register
+        """
+        targets = resolve_targets(operator, targets, self.num_qubits)
+        spread = [_spread(local, targets) for local in range(2 ** len(targets))]
+        mask = spread[-1]
+        old_amplitudes, self.amplitudes = self.amplitudes, {}
+        for index, amplitude in old_amplitudes.items():
+            column = operator.columns.get(_gather(index, targets))
+            if column is None:
+                continue
+            rest = index & ~mask
+            for row, entry in column.items():
+                self._add_amplitude(rest | spread[row], entry * amplitude)
+        self.amplitudes = _drop_zeros(self.amplitudes)
+
+    def apply_factor(self, factor: LoweredFactor) -> None:
+        """Applies every operator of a lowered factor to the qubits it targets, in place"""
+        check_register(factor, self.num_qubits)
+        for operator, targets in factor.steps:
+            self.apply(operator, targets)
+
+    def scale(self, coefficient: sympy.Expr) -> None:
+        """Multiplies every amplitude by a scalar in place"""
+        self.amplitudes = _drop_zeros(
+            {index: coefficient * amplitude for index, amplitude in self.amplitudes.items()}
+        )
+
+    def add(self, other: "SparseState") -> None:
+        """Adds another state of the same size to this one in place"""
+        if other.num_qubits != self.num_qubits:
+            raise ValueError(
+                f"Cannot add a {other.num_qubits} qubit state to a {self.num_qubits} qubit state"
+            )
+        for index, amplitude in other.amplitudes.items():
+            self._add_amplitude(index, amplitude)
+        self.amplitudes = _drop_zeros(self.amplitudes)
+
+
+def _drop_zeros(amplitudes: Amplitudes) -> Amplitudes:
+    return {index: amplitude for index, amplitude in amplitudes.items() if amplitude != 0}
+
+
+def _gather(index: int, targets: Sequence[int]) -> int:
+    local = 0
+    for target in targets:
+        local = (local << 1) | ((index >> target) & 1)
+    return local
+
+
+def _spread(local: int, targets: Sequence[int]) -> int:
+    index = 0
+    for position, target in enumerate(reversed(targets)):
+        index |= ((local >> position) & 1) << target
+    return index
+
+
+def _collect_terms(
+    expr: sympy.Expr, coefficient: sympy.Expr, terms: List[Tuple[sympy.Expr, str]]
+) -> None:
+    if isinstance(expr, sympy.Add):
+        for arg in expr.args:
+            _collect_terms(arg, coefficient, terms)
+    elif isinstance(expr, sympy.Mul):
+        c_part, nc_part = expr.args_cnc()
+        if len(nc_part) != 1:
+            raise ValueError(f"{expr} is not a computational basis state")
+        _collect_terms(nc_part[0], coefficient * sympy.Mul(*c_part), terms)
+    elif isinstance(expr, Ket):
+        terms.append((coefficient, basis_label(expr)))
+    elif isinstance(expr, TensorProduct):
+        labels = [basis_label(arg) for arg in expr.args if isinstance(arg, Ket)]
+        if len(labels) == len(expr.args):
+            terms.append((coefficient, "".join(labels)))
+        else:
+            expanded = expr.expand(tensorproduct=True)
+            if expanded == expr:
+                raise ValueError(f"{expr} is not a computational basis state")
+            _collect_terms(expanded, coefficient, terms)
+    else:
+        raise ValueError(f"{expr} is not a computational basis state")
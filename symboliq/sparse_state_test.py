@@ -0,0 +1,97 @@
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+from sympy.physics.quantum.gate import XGate
+from sympy.physics.quantum.qubit import Qubit
+
+from symboliq.dirac_notation import b_1, h, i, ket_0, ket_1, x
+from symboliq.operators import lower_factor, lower_operator
+from symboliq.sparse_state import SparseState
+
+alpha = sympy.Symbol("alpha", complex=True)
+beta = sympy.Symbol("beta", complex=True)
+one = sympy.Integer(1)
+
+
+def test_from_expr() -> None:
+    assert SparseState.from_expr(ket_1) == SparseState(1, {1: one})
+    assert SparseState.from_expr(alpha * ket_0 + beta * ket_1) == SparseState(
+        1, {0: alpha, 1: beta}
+    )
+    assert SparseState.from_expr(Qubit("10") + TensorProduct(ket_0, ket_1)) == SparseState(
+        2, {0b10: one, 0b01: one}
+    )
+    assert SparseState.from_expr(ket_0 - ket_0 + ket_1) == SparseState(1, {1: one})
+    assert SparseState.from_expr(TensorProduct(ket_0 + ket_1, ket_0) / 2) == SparseState(
+        2, {0b00: one / 2, 0b10: one / 2}
+    )
+
+
+def test_from_expr_errors() -> None:
+    with pytest.raises(ValueError, match="different numbers of qubits"):
+        SparseState.from_expr(ket_0 + Qubit("01"))
+    with pytest.raises(ValueError, match="not a computational basis state"):
+        SparseState.from_expr(x * ket_0)
+    with pytest.raises(ValueError, match="not a computational basis state"):
+        SparseState.from_expr(TensorProduct(x, ket_0))
+    with pytest.raises(ValueError, match="not a computational basis state"):
+        SparseState.from_expr(alpha)
+
+
+def test_to_expr() -> None:
+    assert SparseState(1, {0: alpha, 1: beta}).to_expr() == alpha * ket_0 + beta * ket_1
+    assert SparseState(2, {0b01: one}).to_expr() == TensorProduct(ket_0, ket_1)
+    assert SparseState(2).to_expr() == 0
+
+
+def test_eq_and_repr() -> None:
+    assert SparseState(1, {0: one}) != SparseState(2, {0: one})
+    assert SparseState(1) != {}
+    assert repr(SparseState(1, {0: one})) == "SparseState(1, {0: 1})"
+
+
+def test_apply() -> None:
+    state = SparseState(1, {0: one})
+    state.apply(*lower_operator(h))
+    state.apply(*lower_operator(h))
+    assert state == SparseState(1, {0: one})
+
+    state = SparseState(3, {0b000: alpha, 0b100: beta})
+    state.apply(lower_operator(x)[0], (2,))
+    assert state == SparseState(3, {0b100: alpha, 0b000: beta})
+    state.apply(lower_operator(x)[0], (0,))
+    assert state == SparseState(3, {0b101: alpha, 0b001: beta})
+
+    state = SparseState(1, {0: alpha})
+    state.apply(*lower_operator(b_1))
+    assert state == SparseState(1)
+
+
+def test_apply_errors() -> None:
+    state = SparseState(2, {0: one})
+    with pytest.raises(ValueError, match="cannot act on 2 qubits"):
+        state.apply(*lower_operator(x))
+    with pytest.raises(ValueError, match="Invalid targets"):
+        state.apply(lower_operator(x)[0], (2,))
+    with pytest.raises(ValueError, match="Invalid targets"):
+        state.apply(lower_operator(x)[0], (0, 1))
+
+
+def test_apply_factor() -> None:
+    state = SparseState(3, {0b000: alpha, 0b100: beta})
+    state.apply_factor(lower_factor(TensorProduct(x, i, x)))
+    assert state == SparseState(3, {0b101: alpha, 0b001: beta})
+    state.apply_factor(lower_factor(XGate(1)))
+    assert state == SparseState(3, {0b111: alpha, 0b011: beta})
+    with pytest.raises(ValueError, match="A 2 qubit operator cannot act on 3 qubits"):
+        state.apply_factor(lower_factor(TensorProduct(i, i)))
+
+
+def test_scale_and_add() -> None:
+    state = SparseState(1, {0: one, 1: one})
+    state.scale(alpha)
+    assert state == SparseState(1, {0: alpha, 1: alpha})
+    state.add(SparseState(1, {1: -alpha}))
+    assert state == SparseState(1, {0: alpha})
+    with pytest.raises(ValueError, match="Cannot add a 2 qubit state"):
+        state.add(SparseState(2))
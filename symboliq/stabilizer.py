@@ -0,0 +1,238 @@
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import sympy
+from sympy.physics.quantum.gate import CNotGate, HadamardGate, IdentityGate, XGate, YGate, ZGate
+
+from symboliq.coefficients import Sqrt2Complex
+from symboliq.operators import GATE_TABLE, LoweredFactor, SparseOperator, check_register
+from symboliq.sparse_state import SparseState
+
+# A Pauli operator i**phase * X**x * Z**z, where bit k of x and z is qubit k and every X is
+# written to the left of the Z on the same qubit
+Pauli = Tuple[int, int, int]
+
+# i**k for k = 0, 1, 2, 3
+_PHASES = tuple(
+    Sqrt2Complex.from_sympy(phase) for phase in (sympy.S.One, sympy.I, -sympy.S.One, -sympy.I)
+)
+_ZERO = Sqrt2Complex.from_rational(0)
+_HALF_SQRT2 = Sqrt2Complex.from_sympy(sympy.sqrt(2) / 2)
+
+Signature = Tuple[int, FrozenSet[Tuple[int, int, Sqrt2Complex]]]
+
+
+def _signature(operator: SparseOperator) -> Optional[Signature]:
+    # Exact entries, so that a floating point matrix close to a Clifford gate isn't taken for one
+    try:
+        entries = frozenset(
+            (j, i, Sqrt2Complex.from_sympy(entry))
+            for j, column in operator.columns.items()
+            for i, entry in column.items()
+        )
+    except ValueError:
+        return None
+    return operator.num_qubits, entries
+
+
+# The gates the tableau can apply, recognised by their matrix elements so that the Dirac
+# notation operators such as h and cx are found as well as the sympy gates
+_CLIFFORD_GATES: Dict[Optional[Signature], str] = {
+    _signature(GATE_TABLE[gate]): name
+    for gate, name in [
+        (IdentityGate, "i"),
+        (XGate, "x"),
+        (YGate, "y"),
+        (ZGate, "z"),
+        (HadamardGate, "h"),
+        (CNotGate, "cx"),
+    ]
+}
+
+
+def clifford_name(operator: SparseOperator) -> Optional[str]:
+    """Returns "i", "x", "y", "z", "h" or "cx" if the operator is that gate, otherwise None"""
+    if operator.num_qubits > 2:
+        return None
+    return _CLIFFORD_GATES.get(_signature(operator))
+
+
+def is_clifford(factors: List[LoweredFactor]) -> bool:
+    """Returns whether every operator of the lowered factors is a gate the tableau can apply"""
+    return all(
+        clifford_name(operator) is not None for factor in factors for operator, _ in factor.steps
+    )
+
+
+def _multiply(first: Pauli, second: Pauli) -> Pauli:
+    phase, x, z = first
+    other_phase, other_x, other_z = second
+    # Moving the X's of the second operator left past the Z's of the first flips the sign once
+    # for every qubit they share
+    sign = 2 * (bin(z & other_x).count("1") % 2)
+    return (phase + other_phase + sign) % 4, x ^ other_x, z ^ other_z
+
+
+class StabilizerState:
+    """A state reached from a computational basis state by I, X, Y, Z, H and CNOT gates, stored
+    as the n Pauli operators that stabilize it.
+
+    A gate updates each stabilizer in time linear in the number of qubits, however many basis
+    states the state is spread over. The stabilizers fix the state only up to a global phase,
+    so the exact amplitude of one basis state in its support is kept as well, which fixes every
+    other amplitude. That amplitude is the initial ``coefficient`` times ``scale``, an element
+    of Q(sqrt(2), i). Basis indices are read like those of a SparseState.
+    """
+
+    __slots__ = ("num_qubits", "stabilizers", "reference", "scale", "coefficient")
+
+    def __init__(
+        self, num_qubits: int, basis_index: int = 0, coefficient: sympy.Expr = sympy.S.One
+    ):
+        self.num_qubits = num_qubits
+        # Z_k, with a sign of -1 if qubit k is set, stabilizes the basis state
+        self.stabilizers: List[Pauli] = [
+            (2 * ((basis_index >> qubit) & 1), 0, 1 << qubit) for qubit in range(num_qubits)
+        ]
+        self.reference = basis_index
+        self.scale = _PHASES[0]
+        self.coefficient = coefficient
+
+    @classmethod
+    def from_sparse_state(cls, state: SparseState) -> "StabilizerState":
+        if len(state.amplitudes) != 1:
+            raise ValueError("The stabilizer backend needs a single computational basis state")
+        ((basis_index, amplitude),) = state.amplitudes.items()
+        return cls(state.num_qubits, basis_index, amplitude)
+
+    def apply_factor(self, factor: LoweredFactor) -> None:
+        """Applies every gate of a lowered factor to the qubits it targets, in place"""
+        check_register(factor, self.num_qubits)
+        for operator, targets in factor.steps:
+            name = clifford_name(operator)
+            if name is None:
+                raise ValueError(f"{operator} is not a Clifford gate the tableau can apply")
+            self.apply(name, targets)
+
+    def apply(self, name: str, targets: Tuple[int, ...]) -> None:
+        """Applies a gate in place
+        Args:
+            name: "i", "x", "y", "z", "h" or "cx"
+            targets: The qubits it acts on, the control first for "cx"
+        """
+        if name == "cx":
+            self._cx(*targets)
+        elif name != "i":
+            self._one_qubit_gate(name, targets[0])
+
+    def _one_qubit_gate(self, name: str, qubit: int) -> None:
+        bit = 1 << qubit
+        reference_bit = (self.reference >> qubit) & 1
+        if name == "h":
+            self._hadamard(qubit, reference_bit)
+            return
+        if name == "x":
+            self.reference ^= bit
+        elif name == "y":
+            # Y|b> = i(-1)**b |1 - b>
+            self.scale *= _PHASES[1 + 2 * reference_bit]
+            self.reference ^= bit
+        else:
+            self.scale *= _PHASES[2 * reference_bit]
+        # A stabilizer changes sign if it anticommutes with the gate on this qubit: X with Z,
+        # Z with X, and Y with X and Z
+        x_mask = bit if name in ("y", "z") else 0
+        z_mask = bit if name in ("x", "y") else 0
+        self.stabilizers = [
+            ((phase + 2 * (bool(x & x_mask) != bool(z & z_mask))) % 4, x, z)
+            for phase, x, z in self.stabilizers
+        ]
+
+    def _hadamard(self, qubit: int, reference_bit: int) -> None:
+        bit = 1 << qubit
+        # <b'|H|psi> sums the amplitudes of the reference and its neighbour across this qubit
+        ratio = self._ratio(self.reference ^ bit)
+        kept = _PHASES[2 * reference_bit] + ratio
+        if kept != 0:
+            self.scale = _HALF_SQRT2 * kept * self.scale
+        else:
+            # The two cancel, so the neighbour is in the support instead
+            moved = _PHASES[0] + _PHASES[2 - 2 * reference_bit] * ratio
+            self.scale = _HALF_SQRT2 * moved * self.scale
+            self.reference ^= bit
+        # H X**a Z**b H = Z**a X**b = (-1)**(ab) X**b Z**a
+        stabilizers = []
+        for phase, x, z in self.stabilizers:
+            x_bit, z_bit = x & bit, z & bit
+            if x_bit and z_bit:
+                phase = (phase + 2) % 4
+            x = (x & ~bit) | z_bit
+            z = (z & ~bit) | x_bit
+            stabilizers.append((phase, x, z))
+        self.stabilizers = stabilizers
+
+    def _cx(self, control: int, target: int) -> None:
+        control_bit, target_bit = 1 << control, 1 << target
+        if self.reference & control_bit:
+            self.reference ^= target_bit
+        # CX copies X from the control to the target and Z from the target to the control,
+        # which keeps every X to the left of every Z, so no sign changes
+        stabilizers = []
+        for phase, x, z in self.stabilizers:
+            if x & control_bit:
+                x ^= target_bit
+            if z & target_bit:
+                z ^= control_bit
+            stabilizers.append((phase, x, z))
+        self.stabilizers = stabilizers
+
+    def _x_basis(self) -> Dict[int, Pauli]:
+        # Products of the stabilizers whose X parts are linearly independent, keyed by the
+        # highest bit of their X part, which differs between them
+        basis: Dict[int, Pauli] = {}
+        for stabilizer in self.stabilizers:
+            stabilizer = self._reduce(basis, stabilizer)
+            if stabilizer[1]:
+                basis[stabilizer[1].bit_length() - 1] = stabilizer
+        return basis
+
+    @staticmethod
+    def _reduce(basis: Dict[int, Pauli], pauli: Pauli) -> Pauli:
+        for pivot in sorted(basis, reverse=True):
+            if pauli[1] >> pivot & 1:
+                pauli = _multiply(pauli, basis[pivot])
+        return pauli
+
+    def _ratio(self, basis_index: int) -> Sqrt2Complex:
+        # A stabilizer S = i**e X**d Z**z with d = basis_index ^ reference gives
+        # <basis_index|psi> = <basis_index|S|psi> = i**e (-1)**|z & reference| <reference|psi>.
+        # Without one the basis state is outside the support
+        difference = (0, self.reference ^ basis_index, 0)
+        phase, x, z = self._reduce(self._x_basis(), difference)
+        if x:
+            return _ZERO
+        # The reduction multiplied the difference by S, adding S's phase and Z part to it
+        return _PHASES[(phase + 2 * bin(z & self.reference).count("1")) % 4]
+
+    def amplitude_of(self, basis_index: int) -> sympy.Expr:
+        """Returns the amplitude of a computational basis state"""
+        return (self._ratio(basis_index) * self.scale).to_sympy() * self.coefficient
+
+    @property
+    def num_terms(self) -> int:
+        """The number of basis states with a nonzero amplitude, which is a power of two"""
+        return 2 ** len(self._x_basis())
+
+    def to_sparse_state(self) -> SparseState:
+        """Lists every amplitude, of which there are num_terms"""
+        products: List[Pauli] = [(0, 0, 0)]
+        for stabilizer in self._x_basis().values():
+            products += [_multiply(product, stabilizer) for product in products]
+        amplitudes = {}
+        for phase, x, z in products:
+            sign = 2 * bin(z & self.reference).count("1")
+            scale = _PHASES[(phase + sign) % 4] * self.scale
+            amplitudes[self.reference ^ x] = scale.to_sympy() * self.coefficient
+        return SparseState(self.num_qubits, amplitudes)
+
+    def to_expr(self) -> sympy.Expr:
+        return self.to_sparse_state().to_expr()
@@ -0,0 +1,95 @@
+import random
+
+import pytest
+import sympy
+from sympy.physics.quantum import TensorProduct
+from sympy.physics.quantum.gate import CNotGate, HadamardGate, TGate, XGate, YGate, ZGate
+from sympy.physics.quantum.qubit import Qubit
+
+from symboliq import benchmarks
+from symboliq.dirac_notation import B_0, DiracNotation, cx, h, i, ket_0, ket_1, x, y
+from symboliq.operators import (
+    GATE_TABLE,
+    LoweredFactor,
+    from_matrix,
+    lower_factor,
+    lower_operator,
+)
+from symboliq.sparse_state import SparseState
+from symboliq.stabilizer import StabilizerState, clifford_name, is_clifford
+
+ONE_QUBIT_GATES = [XGate, YGate, ZGate, HadamardGate, HadamardGate]
+
+
+def test_clifford_name() -> None:
+    for operator, name in [(i, "i"), (x, "x"), (y, "y"), (h, "h"), (cx, "cx")]:
+        assert clifford_name(lower_operator(operator)[0]) == name
+    assert clifford_name(GATE_TABLE[ZGate]) == "z"
+    assert clifford_name(lower_operator(TGate(0))[0]) is None
+    assert clifford_name(lower_operator(B_0 * sympy.Symbol("alpha"))[0]) is None
+    assert clifford_name(lower_operator(TensorProduct(x, x, x))[0]) is None
+    # Close to h, but not exactly h
+    near_h = from_matrix(sympy.Matrix([[1, 1], [1, -1]]) * sympy.Float(0.7071067811865476))
+    assert clifford_name(near_h) is None
+    assert clifford_name(lower_operator(sympy.Float(1.0) * x)[0]) == "x"
+    assert is_clifford([lower_factor(TensorProduct(h, cx))])
+    assert not is_clifford([lower_factor(XGate(0)), lower_factor(TGate(0))])
+
+
+def test_random_circuits() -> None:
+    rng = random.Random(0)
+    for _ in range(60):
+        num_qubits = rng.randint(1, 4)
+        label = "".join(rng.choice("01") for _ in range(num_qubits))
+        state = SparseState.from_expr(Qubit(label))
+        tableau = StabilizerState.from_sparse_state(state)
+        for _ in range(rng.randint(1, 20)):
+            if num_qubits > 1 and rng.random() < 0.3:
+                gate: sympy.Expr = CNotGate(*rng.sample(range(num_qubits), 2))
+            else:
+                gate = rng.choice(ONE_QUBIT_GATES)(rng.randrange(num_qubits))
+            state.apply_factor(lower_factor(gate))
+            tableau.apply_factor(lower_factor(gate))
+
+        assert tableau.num_terms == len(state.amplitudes)
+        amplitudes = tableau.to_sparse_state().amplitudes
+        assert amplitudes.keys() == state.amplitudes.keys()
+        for index in range(2**num_qubits):
+            expected = state.amplitudes.get(index, 0)
+            assert sympy.expand(tableau.amplitude_of(index) - expected) == 0
+            assert sympy.expand(amplitudes.get(index, 0) - expected) == 0
+
+
+def test_many_qubits() -> None:
+    tableau = StabilizerState(50)
+    tableau.apply("h", (49,))
+    for control in range(49, 0, -1):
+        tableau.apply("cx", (control, control - 1))
+    tableau.apply("i", (3,))
+    assert tableau.to_expr() == sympy.sqrt(2) / 2 * TensorProduct(*[ket_0] * 50) + sympy.sqrt(
+        2
+    ) / 2 * TensorProduct(*[ket_1] * 50)
+
+    tableau = StabilizerState(50, coefficient=sympy.Symbol("alpha"))
+    for qubit in range(50):
+        tableau.apply("h", (qubit,))
+    assert tableau.num_terms == 2**50
+    assert tableau.amplitude_of(2**50 - 1) == sympy.Symbol("alpha") / 2**25
+
+
+def test_invalid_states_and_gates() -> None:
+    with pytest.raises(ValueError, match="single computational basis state"):
+        StabilizerState.from_sparse_state(SparseState.from_expr(ket_0 + ket_1))
+    tableau = StabilizerState(1)
+    with pytest.raises(ValueError, match="not a Clifford gate"):
+        tableau.apply_factor(lower_factor(TGate(0)))
+    with pytest.raises(ValueError, match="cannot act on 1 qubits"):
+        tableau.apply_factor(LoweredFactor(2, []))
+
+
+def test_benchmark_circuits() -> None:
+    for circuit in [benchmarks.ghz(4), benchmarks.random_clifford(4, 3, seed=2)]:
+        notation = DiracNotation(circuit, backend="stabilizer")
+        tableau = notation.stabilizer_reduce()
+        assert tableau is not None
+        assert sympy.expand(tableau.to_expr() - notation.sparse_reduce().to_expr()) == 0
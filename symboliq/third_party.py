@@ -28,9 +28,11 @@
 # DAMAGE.
 
 # pragma: no cover
+import functools
+import operator
 from typing import List, Union
 
-from sympy import Add, Basic, Mul, Pow
+from sympy import Add, Basic, Expr, Mul, Pow
 from sympy.physics.quantum import AntiCommutator, Commutator, OuterProduct
 from sympy.physics.quantum.qexpr import QuantumError
 from sympy.physics.quantum.tensorproduct import (
@@ -147,6 +149,57 @@ def tensor_product_simp_Mul_fork(e):  # type: ignore  # noqa: C901
         return e
 
 
+def tensor_product_simp_Add_fork(e):  # type: ignore
+    """Simplify every term of an ``Add`` of ``Mul``s of ``TensorProduct``s in one pass.
+
+    Terms whose noncommutative factors are all ``TensorProduct``s of the same
+    length, none of them nested, are multiplied slot by slot: the factors'
+    arguments are transposed into one column per slot, and the product of each
+    distinct column is computed once for the whole sum. After expanding a gate
+    applied to a state of many qubits most slots hold one of a handful of
+    columns such as ``|0><0|*|0>``, so most products are looked up rather than
+    recomputed. Every other term goes through ``tensor_product_simp_fork``.
+
+    Parameters
+    ==========
+
+    e : Add
+        A sum of products of ``TensorProduct``s to be simplified.
+
+    Returns
+    =======
+
+    e : Expr
+        The sum of the simplified terms.
+
+    """
+    columns = {}
+    terms = []
+    for term in e.args:
+        c_part, nc_part = term.args_cnc() if isinstance(term, Mul) else ([], [])
+        if len(nc_part) < 2 or not all(
+            isinstance(factor, TensorProduct)
+            and len(factor.args) == len(nc_part[0].args)
+            and not any(isinstance(arg, TensorProduct) for arg in factor.args)
+            for factor in nc_part
+        ):
+            terms.append(tensor_product_simp_fork(term))
+            continue
+        slots = []
+        for column in zip(*[factor.args for factor in nc_part]):
+            split = columns.get(column)
+            if split is None:
+                # Multiplying pairwise, as the Mul of two factors would, keeps for
+                # instance Ket*Bra an OuterProduct. The product is then split as
+                # TensorProduct.flatten would split it
+                cp, ncp = functools.reduce(operator.mul, column).args_cnc()
+                split = columns[column] = (cp, Mul._from_args(ncp))
+            c_part.extend(split[0])
+            slots.append(split[1])
+        terms.append(Mul(*c_part, Expr.__new__(TensorProduct, *slots)))
+    return Add(*terms)
+
+
 def tensor_product_simp_fork(e, **hints):  # type: ignore
     """Try to simplify and combine TensorProducts.
 
@@ -182,7 +235,7 @@ def tensor_product_simp_fork(e, **hints):  # type: ignore
 
     """
     if isinstance(e, Add):
-        return Add(*[tensor_product_simp_fork(arg) for arg in e.args])
+        return tensor_product_simp_Add_fork(e)
     elif isinstance(e, Pow):
         if isinstance(e.base, TensorProduct):
             return tensor_product_simp_Pow(e)
@@ -0,0 +1,30 @@
+import sympy
+from sympy.physics.quantum import TensorProduct
+
+from symboliq import benchmarks
+from symboliq.dirac_notation import b_0, h, ket_0, ket_1, x
+from symboliq.third_party import tensor_product_simp_Add_fork, tensor_product_simp_fork
+
+
+def test_tensor_product_simp_add() -> None:
+    circuit = benchmarks.hadamard_layers(3, 1)
+    expanded = circuit.expand(tensorproduct=True)
+    assert isinstance(expanded, sympy.Add) and len(expanded.args) == 64
+    assert tensor_product_simp_Add_fork(expanded) == sympy.Add(
+        *[tensor_product_simp_fork(term) for term in expanded.args]
+    )
+
+    # Terms of other shapes are simplified one by one
+    alpha = sympy.Symbol("alpha")
+    expr = (
+        alpha * TensorProduct(x, b_0) * TensorProduct(ket_0, ket_1)
+        + TensorProduct(h, x) ** 2
+        + x * ket_0
+        + ket_1
+    )
+    assert tensor_product_simp_fork(expr) == (
+        alpha * TensorProduct(x * ket_0, b_0 * ket_1)
+        + TensorProduct(h**2, x**2)
+        + x * ket_0
+        + ket_1
+    )